@@ -1,8 +1,14 @@
 import streamlit as st
-import pickle
 import pandas as pd
 import numpy as np
-import joblib
+
+from utils.cache import PredictionCache, make_key
+from utils.config import MODEL_LABELS
+from utils.manifest import load_manifest
+from utils.metrics import register_cache, span, start_exporters
+from utils.models import load_pipelines, model_version
+from utils.prediction import ensemble_range, is_parquet, predict_all, write_batch_results
+from utils.sweep import AREA_GRID_POINTS, area_grid, run_sweep
 
 # ---------------------------------------
 # PAGE TITLE
@@ -14,20 +20,36 @@ st.write("Enter property details below to get an accurate price prediction using
 # ---------------------------------------
 # LOAD PICKLE FILES
 # ---------------------------------------
-@st.cache_resource
-def load_models():
-    df = pickle.load(open(r'D:/PREDICTION_MODEL/datasets/df.pkl', 'rb'))
-    rf = pickle.load(open(r'D:/PREDICTION_MODEL/models/RANDOM_FOREST_pipeline.pkl', 'rb'))
-    xgb = joblib.load(r'D:/PREDICTION_MODEL/models/XGB_full_pipeline.pkl')
-    ext = joblib.load(r'D:/PREDICTION_MODEL/models/EXTRA_TREES_full_pipeline.pkl')
+# Keyed on the model version, so replaced artifacts (or a new version in the
+# shared model store) are picked up without restarting the app
+@st.cache_resource(max_entries=2)
+def load_models(version):
+    with span("load_models"):
+        # Selectbox options and input ranges come from the small manifest, not df.pkl
+        manifest = load_manifest(version=version)
+        # Pipelines are loaded on their first predict, so the form renders right away.
+        # With a shared model store they are pinned to ``version``, the cache key's version.
+        models = load_pipelines(lazy=True, version=version)
 
-    return df, rf, xgb, ext
+    return manifest, models['rf'], models['xgb'], models['ext']
 
 
+# Shared by every session; keys include the model version so a retrained
+# pipeline never serves stale predictions
+@st.cache_resource
+def get_prediction_cache():
+    cache = PredictionCache(maxsize=4096, ttl_seconds=3600)
+    register_cache("prediction", cache)
+    return cache
+
 
-df, rf_model, xgb_model, ext_model = load_models()
+# Metrics endpoint / file / profiler, if configured (no-op after the first run)
+start_exporters()
+MODEL_VERSION = model_version()
+manifest, rf_model, xgb_model, ext_model = load_models(MODEL_VERSION)
+prediction_cache = get_prediction_cache()
+options = manifest['categorical']
 
-# st.dataframe(df)
 # ---------------------------------------
 # YES/NO FUNCTION
 # ---------------------------------------
@@ -43,52 +65,51 @@ col1, col2, col3 = st.columns(3)
 
 with col1:
     property_type = st.selectbox("🏠 Property Type", ['flat', 'house'])
-    bedrooms = st.selectbox("🛏️ Number of Bedrooms", sorted(df['bedRoom'].unique().tolist()))
-    bathroom = st.selectbox("🚿 Number of Bathrooms", sorted(df['bathroom'].unique().tolist()))
-    balcony = st.selectbox("🌇 Number of Balconies", sorted(df['balcony'].unique().tolist()))
+    bedrooms = st.selectbox("🛏️ Number of Bedrooms", options['bedRoom'])
+    bathroom = st.selectbox("🚿 Number of Bathrooms", options['bathroom'])
+    balcony = st.selectbox("🌇 Number of Balconies", options['balcony'])
 
 with col2:
-    sector = st.selectbox("📍 Sector", sorted(df['sector'].unique().tolist()))
-    property_age = st.selectbox("📅 Property Age", sorted(df['agePossession'].unique().tolist()))
+    sector = st.selectbox("📍 Sector", options['sector'])
+    property_age = st.selectbox("📅 Property Age", options['agePossession'])
     built_up_area = st.number_input("📐 Built-up Area (sq.ft)", step=10.0, min_value=100.0)
 
 with col3:
     servant_room = st.selectbox("🧹 Servant Room", ["No", "Yes"])
     store_room = st.selectbox("📦 Store Room", ["No", "Yes"])
-    furnishing_type = st.selectbox("🛋️ Furnishing Type", sorted(df['furnishing_type'].unique().tolist()))
-    luxury_category = st.selectbox("💎 Luxury Category", sorted(df['luxury_category'].unique().tolist()))
-    floor_category = st.selectbox("🏢 Floor Category", sorted(df['floor_category'].unique().tolist()))
+    furnishing_type = st.selectbox("🛋️ Furnishing Type", options['furnishing_type'])
+    luxury_category = st.selectbox("💎 Luxury Category", options['luxury_category'])
+    floor_category = st.selectbox("🏢 Floor Category", options['floor_category'])
 
 # Convert Yes/No to 0/1
 servant_room = yes_no_to_binary(servant_room)
 store_room = yes_no_to_binary(store_room)
 
+# Form DataFrame
+input_data = pd.DataFrame([[
+    property_type, sector, bedrooms, bathroom, balcony, property_age,
+    built_up_area, servant_room, store_room, furnishing_type,
+    luxury_category, floor_category
+]], columns=[
+    'property_type', 'sector', 'bedRoom', 'bathroom', 'balcony',
+    'agePossession', 'built_up_area', 'servant room', 'store room',
+    'furnishing_type', 'luxury_category', 'floor_category'
+])
+
 # ---------------------------------------
 # PREDICTION
 # ---------------------------------------
 if st.button("🔍 Predict Price"):
 
-    # Form DataFrame
-    input_data = pd.DataFrame([[
-        property_type, sector, bedrooms, bathroom, balcony, property_age,
-        built_up_area, servant_room, store_room, furnishing_type,
-        luxury_category, floor_category
-    ]], columns=[
-        'property_type', 'sector', 'bedRoom', 'bathroom', 'balcony',
-        'agePossession', 'built_up_area', 'servant room', 'store room',
-        'furnishing_type', 'luxury_category', 'floor_category'
-    ])
-
     st.subheader("✅ Your Input Summary")
     st.dataframe(input_data, use_container_width=True)
 
-    # ---------------------------------------
-    # FUNCTION FOR PREDICTION
-    # ---------------------------------------
-    def predict_price(model, df):
-        price = np.expm1(model.predict(df))[0]
-        return round(price - 0.22, 2), round(price + 0.22, 2)
-
+    area_range = manifest['numeric']['built_up_area']
+    if not area_range['min'] <= built_up_area <= area_range['max']:
+        st.warning(
+            f"⚠️ Built-up area is outside the training range "
+            f"({area_range['min']:.0f}–{area_range['max']:.0f} sq.ft), so this estimate is an extrapolation."
+        )
 
     # Note section
     st.info("""
@@ -100,18 +121,180 @@ if st.button("🔍 Predict Price"):
     st.markdown("---")
     st.header("📈 Predictions")
 
+    # Repeat queries skip the pipelines entirely
+    cache_key = make_key(input_data.iloc[0], MODEL_VERSION)
+    predictions = prediction_cache.get(cache_key)
+    from_cache = predictions is not None
+    if not from_cache:
+        # All three models run concurrently, so latency is the slowest model, not the sum
+        with span("predict_price"):
+            results = predict_all({'rf': rf_model, 'xgb': xgb_model, 'ext': ext_model}, input_data)
+        ens_low, ens_high = ensemble_range(results)
+        predictions = {name: (r['low'][0], r['high'][0]) for name, r in results.items()}
+        predictions['ensemble'] = (ens_low[0], ens_high[0])
+        predictions['timings'] = {name: r['seconds'] * 1000 for name, r in results.items()}
+        prediction_cache.set(cache_key, predictions)
+
+    # Weighted ensemble
+    ens_low, ens_high = predictions['ensemble']
+    st.subheader(f"🎯 Combined Estimate: {ens_low} Cr – {ens_high} Cr")
+    st.caption("Weighted average of the three models, weighted by each model's R² score.")
+
     # Random Forest
-    rf_low, rf_high = predict_price(rf_model, input_data)
+    rf_low, rf_high = predictions['rf']
     st.success(f"🌲 **Random Forest Estimate:** {rf_low} Cr – {rf_high} Cr")
 
     # XGBoost
-    xgb_low, xgb_high = predict_price(xgb_model, input_data)
+    xgb_low, xgb_high = predictions['xgb']
     st.info(f"⚡ **XGBoost Estimate:** {xgb_low} Cr – {xgb_high} Cr")
 
     # Extra Trees
-    ext_low, ext_high = predict_price(ext_model, input_data)
+    ext_low, ext_high = predictions['ext']
     st.warning(f"🌳 **Extra Trees Estimate:** {ext_low} Cr – {ext_high} Cr")
 
     st.markdown("---")
     st.write("✅ All predictions include the ±0.22 Cr uncertainty margin.")
 
+    with st.expander("⏱️ Model Timings"):
+        if from_cache:
+            st.write("Served from the prediction cache — no model was run.")
+        else:
+            st.dataframe(pd.DataFrame({
+                'Model': [MODEL_LABELS[name] for name in predictions['timings']],
+                'Predict Time (ms)': [round(ms, 2) for ms in predictions['timings'].values()],
+            }), use_container_width=True, hide_index=True)
+
+    stats = prediction_cache.stats()
+    st.caption(
+        f"⚡ Prediction cache: {stats['hits']} hits / {stats['misses']} misses "
+        f"({stats['hit_rate']:.0%} hit rate, {stats['size']} entries)"
+    )
+
+
+# ---------------------------------------
+# WHAT-IF SWEEP
+# ---------------------------------------
+st.markdown("---")
+st.header("🔀 What-If Sweep")
+st.write("Keep the details above and price the same property across every sector or a range of built-up areas.")
+
+sweep_field = st.radio("Vary", ["📍 Sector", "📐 Built-up Area"], horizontal=True)
+if sweep_field == "📍 Sector":
+    field, values = 'sector', options['sector']
+else:
+    area_range = manifest['numeric']['built_up_area']
+    area_low, area_high = st.slider(
+        "Built-up area range (sq.ft)",
+        min_value=float(area_range['min']),
+        max_value=float(area_range['max']),
+        value=(max(float(area_range['min']), built_up_area * 0.5),
+               min(float(area_range['max']), max(built_up_area * 2, built_up_area + 100))),
+        step=10.0,
+    )
+    field, values = 'built_up_area', area_grid(area_low, area_high, AREA_GRID_POINTS).tolist()
+
+if st.button("🔀 Run Sweep"):
+    # Plotly is only imported once a sweep is run, keeping it off the page's first render
+    import plotly.express as px
+
+    # The whole grid is one predict call per model; repeats come from the shared cache
+    sweep_key = ('sweep', field, tuple(values), make_key(input_data.iloc[0], MODEL_VERSION))
+    sweep = prediction_cache.get(sweep_key)
+    if sweep is None:
+        with span("predict_sweep"):
+            sweep = run_sweep({'rf': rf_model, 'xgb': xgb_model, 'ext': ext_model}, input_data, field, values)
+        prediction_cache.set(sweep_key, sweep)
+    sweep_table, sweep_timings = sweep
+
+    st.caption(
+        f"Scored {len(sweep_table)} variants in one batch per model "
+        f"({max(sweep_timings.values()) * 1000:.0f} ms for the slowest model)."
+    )
+
+    if field == 'sector':
+        ranked = sweep_table.sort_values('rank')
+        best, worst = ranked.iloc[0], ranked.iloc[-1]
+        st.subheader(f"💰 Most expensive: {best['sector']} ({best['ensemble']} Cr) · "
+                     f"Cheapest: {worst['sector']} ({worst['ensemble']} Cr)")
+
+        # Centroids come with the manifest, so the map needs no listing data
+        centroids = pd.DataFrame(
+            [(sector, lat, lon) for sector, (lat, lon) in manifest.get('sector_centroids', {}).items()],
+            columns=['sector', 'latitude', 'longitude'],
+        )
+        map_data = ranked.merge(centroids, on='sector')
+        if not len(map_data):
+            st.caption("No sector coordinates in the model manifest; rebuild it with `python -m utils.manifest`.")
+        else:
+            fig_map = px.scatter_map(
+                map_data,
+                lat='latitude',
+                lon='longitude',
+                color='ensemble',
+                size=np.full(len(map_data), 10),
+                color_continuous_scale=px.colors.sequential.Viridis,
+                zoom=10,
+                map_style="open-street-map",
+                hover_name='sector',
+                hover_data={'ensemble': True, 'rank': True, 'latitude': False, 'longitude': False},
+                labels={'ensemble': 'Price (Cr)'},
+            )
+            fig_map.update_layout(height=600)
+            st.plotly_chart(fig_map, use_container_width=True)
+    else:
+        ranked = sweep_table
+        fig_curve = px.line(
+            sweep_table,
+            x='built_up_area',
+            y=['ensemble', 'rf', 'xgb', 'ext'],
+            labels={'built_up_area': 'Built-up Area (sq.ft)', 'value': 'Price (Cr)', 'variable': 'Model'},
+            title='Predicted Price vs Built-up Area',
+        )
+        fig_curve.add_vline(x=built_up_area, line_dash='dash', line_color='grey')
+        st.plotly_chart(fig_curve, use_container_width=True)
+
+    st.dataframe(
+        ranked.rename(columns={
+            'rf': MODEL_LABELS['rf'], 'xgb': MODEL_LABELS['xgb'], 'ext': MODEL_LABELS['ext'],
+            'ensemble': '🎯 Combined', 'ensemble_low': 'Combined Low', 'ensemble_high': 'Combined High',
+        }),
+        use_container_width=True,
+        hide_index=True,
+    )
+
+
+# ---------------------------------------
+# BATCH PREDICTION
+# ---------------------------------------
+st.markdown("---")
+st.header("📦 Batch Prediction")
+st.write(
+    "Upload a CSV or Parquet file with the 12 input columns "
+    "(`property_type`, `sector`, `bedRoom`, `bathroom`, `balcony`, `agePossession`, "
+    "`built_up_area`, `servant room`, `store room`, `furnishing_type`, `luxury_category`, "
+    "`floor_category`) to price every listing at once."
+)
+
+uploaded_file = st.file_uploader("📄 Listings file", type=["csv", "parquet", "pq"])
+
+if uploaded_file is not None and st.button("🚀 Run Batch Prediction"):
+    models = {'rf': rf_model, 'xgb': xgb_model, 'ext': ext_model}
+    try:
+        with st.spinner("Scoring listings..."):
+            output, row_count = write_batch_results(
+                models, uploaded_file, uploaded_file.name, manifest=manifest
+            )
+    except ValueError as err:
+        st.error(f"❌ Could not score this file: {err}")
+    else:
+        st.success(f"✅ Scored {row_count} listings with {len(models)} models.")
+        st.caption(", ".join(
+            [f"{MODEL_LABELS[name]}: `{name}_low` / `{name}_high`" for name in models]
+            + ["🎯 Combined: `ensemble_low` / `ensemble_high`"]
+        ))
+        stem = uploaded_file.name.rsplit('.', 1)[0]
+        if is_parquet(uploaded_file.name):
+            file_name, mime = f"{stem}_predictions.parquet", "application/octet-stream"
+        else:
+            file_name, mime = f"{stem}_predictions.csv", "text/csv"
+        st.download_button("⬇️ Download Predictions", output, file_name=file_name, mime=mime)
@@ -1,44 +1,148 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import plotly.express as px
-import ast
-from wordcloud import WordCloud
+import io
+
+from utils.amenity_index import feature_counts, load_amenity_index, property_type_options, sector_options
+from utils.config import VIZ_DATA_PATH, WORDCLOUD_DATA_PATH
+from utils.correlation import build_correlation_stats
+from utils.data_layer import load_viz_data, sector_means, source_signature
+from utils.geo import GeoIndex, bbox_around, zoom_for_radius
+from utils.ingest import load_aggregates, load_listings, store_signature
+from utils.kde import kde_curves
+from utils.metrics import span, start_exporters, timed
+from utils.scatter import (
+    MAX_RENDERED_POINTS, PRICE_COLUMN, SCATTER_POINT_LIMIT,
+    bin_points, build_ols_fits, build_scatter_frames, histogram, sample_points
+)
+from utils.summaries import build_summaries, price_box_stats, select
+
+# Plotting libraries (plotly, matplotlib, seaborn, wordcloud) are imported inside
+# the tab that uses them: tabs only run while open, so a cold start pays for
+# nothing the user hasn't looked at yet.
 
 st.title("🤖 Page 2 – Analytics Dashboard")
 
+# Metrics endpoint / file / profiler, if configured (no-op after the first run)
+start_exporters()
+
 # -------------------------------------------------------------------------------------
 # Load Datasets
 # -------------------------------------------------------------------------------------
-new_df = pd.read_csv(r"D:/PREDICTION_MODEL/datasets/data_viz1.csv")
-wordcloud_df = pd.read_csv(r"D:/PREDICTION_MODEL/datasets/word_cloud_data.csv")
-
+# Cleaned Parquet copies, shared read-only across sessions. The source file's
+# signature is part of the cache key, so editing a CSV invalidates its entry.
+# Once listings have been ingested (utils/ingest.py) the partitioned store and
+# its incrementally updated aggregates replace the 2023 snapshot CSVs.
+@st.cache_resource(max_entries=2)
+def get_viz_data(signature):
+    aggregates = load_aggregates()
+    if aggregates is None:
+        df = load_viz_data()
+        return df, sector_means(df), build_summaries(df)
+    df = load_listings()
+    # Box-plot quantiles aren't additive, so only they are computed from the rows
+    summaries = {'bhk_counts': aggregates.bhk_counts, 'price_box': price_box_stats(df)}
+    return df, aggregates.sector_means(), summaries
+
+
+@st.cache_resource(max_entries=2)
+def get_amenity_index(signature):
+    aggregates = load_aggregates()
+    if aggregates is None:
+        return load_amenity_index()
+    return aggregates.amenity_index
+
+
+# KD-tree and per-zoom grid cells over every listing's coordinates
+@st.cache_resource(max_entries=2)
+def get_geo_index(signature):
+    with span("build.geo_index"):
+        return GeoIndex(get_viz_data(signature)[0])
+
+
+# One PNG per (data version, sector, property type); switching back to a
+# filter already seen by any session is a cache hit
+@st.cache_data(max_entries=256, show_spinner=False)
+def render_wordcloud(signature, sector, property_type):
+    from wordcloud import WordCloud
+
+    frequencies = feature_counts(get_amenity_index(signature), sector, property_type)
+    with span("plot.wordcloud"):
+        wc = WordCloud(width=800, height=500, background_color="white").generate_from_frequencies(frequencies)
+        buffer = io.BytesIO()
+        wc.to_image().save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+# Pairwise sums per property type; "Overall" is merged from them, not rescanned
+@st.cache_resource(max_entries=2)
+def get_correlation_stats(signature):
+    aggregates = load_aggregates()
+    if aggregates is None:
+        return build_correlation_stats(get_viz_data(signature)[0])
+    return aggregates.correlation
+
+
+# Slim per-type frames with price_crore, and every OLS trendline fitted once
+@st.cache_resource(max_entries=2)
+def get_scatter_data(signature):
+    frames = build_scatter_frames(get_viz_data(signature)[0])
+    return frames, build_ols_fits(frames)
+
+
+# Density curves per (data version, property type, feature), computed by FFT
+@st.cache_data(max_entries=64, show_spinner=False)
+def get_kde_curves(signature, property_filter, feature):
+    df = get_viz_data(signature)[0]
+    if property_filter != "Overall":
+        df = df[df["property_type"] == property_filter]
+    with span("kde"):
+        return kde_curves(df, 'price', None if feature == "Overall" else feature)
+
+
+# Heatmaps are cached per (data version, filter) as PNG bytes; ``rows`` changes
+# whenever listings are folded into the stats, so it is part of the key
+@st.cache_data(max_entries=16, show_spinner=False)
+def render_correlation_heatmap(signature, rows, property_filter):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    corr = get_correlation_stats(signature)[property_filter].corr()
+    with span("plot.heatmap"):
+        fig_corr, ax = plt.subplots(figsize=(8, 6))
+        sns.heatmap(corr, annot=True, cmap='coolwarm', fmt=".2f", linewidths=0.5, ax=ax)
+        ax.set_title(f"Correlation Heatmap ({property_filter})")
+        buffer = io.BytesIO()
+        fig_corr.savefig(buffer, format="png", bbox_inches="tight")
+        plt.close(fig_corr)
+    return buffer.getvalue()
 
-numeric_cols = ['price', 'price_per_sqft', 'built_up_area', 'latitude', 'longitude']
-group_df = new_df.groupby('sector')[numeric_cols].mean().reset_index()
 
 # -------------------------------------------------------------------------------------
-# Create Main Tabs
+# Tab Fragments
 # -------------------------------------------------------------------------------------
-tab1, tab2, tab3, tab4, tab5 = st.tabs([
-    "🌍 Geo Price Map",
-    "☁️ WordCloud",
-    "📈 Price Analysis",
-    "🥧 BHK Pie Chart",
-    "📦 BHK Price Comparison"
-])
+# Each tab and sub-tab is an ``st.fragment``: a widget inside it reruns only that
+# function, so changing the pie chart's sector doesn't rebuild the map, the
+# WordCloud or the other charts. Fragments take the data signature as their only
+# argument and pull everything else from the shared caches above.
+
 
 # =====================================================================================
 # 🌍 TAB 1 — GEOMAP
 # =====================================================================================
-with tab1:
+@st.fragment
+@timed("tab.geo")
+def geo_map_tab(viz_signature):
+    import plotly.express as px
+
     st.header('Sector Price per Sqft - Geo Map')
 
-    # Ensure numeric columns
-    for col in ['latitude', 'longitude', 'price_per_sqft', 'built_up_area']:
-        group_df[col] = pd.to_numeric(group_df[col], errors='coerce')
+    group_df = get_viz_data(viz_signature)[1]
+
+    view = st.radio("View", ["Sector averages", "Grid cells", "Listings near a sector"], horizontal=True)
+    if view != "Sector averages":
+        geo_detail_map(get_geo_index(viz_signature), group_df, view)
+        return
 
     # Drop rows with missing coordinates
     map_data = group_df.dropna(subset=['latitude', 'longitude'])
@@ -79,67 +183,91 @@ with tab1:
     st.plotly_chart(fig, use_container_width=True)
 
 
+def geo_detail_map(geo_index, group_df, view):
+    import plotly.express as px
+
+    centres = group_df.dropna(subset=['latitude', 'longitude']).set_index('sector')
+
+    if view == "Grid cells":
+        zoom = st.slider("Zoom", min_value=min(geo_index.grids), max_value=max(geo_index.grids), value=11)
+        map_data = geo_index.cells(zoom)
+        centre = {"lat": map_data['latitude'].mean(), "lon": map_data['longitude'].mean()}
+        st.caption(f"{len(geo_index)} listings in {len(map_data)} cells")
+    else:
+        col1, col2 = st.columns(2)
+        with col1:
+            selected_sector = st.selectbox("Centre on sector", centres.index.tolist())
+        with col2:
+            radius_km = st.slider("Radius (km)", min_value=0.5, max_value=10.0, value=2.0, step=0.5)
+        lat, lon = centres.loc[selected_sector, ['latitude', 'longitude']]
+        nearby = geo_index.within_radius(lat, lon, radius_km)
+        zoom = zoom_for_radius(radius_km, lat)
+        centre = {"lat": lat, "lon": lon}
+        st.caption(
+            f"{len(nearby)} listings within {radius_km:g} km of {selected_sector}"
+            + (f" · mean price {nearby['price'].mean():.2f} Cr" if len(nearby) else "")
+        )
+        if len(nearby) > MAX_RENDERED_POINTS:
+            # Too many markers for the browser: show the cells covering the circle instead
+            map_data = geo_index.cells(zoom, bbox_around(lat, lon, radius_km))
+        else:
+            map_data = nearby.assign(listings=1)
+
+    if map_data.empty:
+        st.warning("No listings for this selection.")
+        return
+
+    fig = px.scatter_map(
+        map_data.rename(columns={'price_per_sqft': 'Mean Price per Sqft'}),
+        lat="latitude",
+        lon="longitude",
+        color='Mean Price per Sqft',
+        size='listings',
+        color_continuous_scale=px.colors.cyclical.IceFire,
+        center=centre,
+        zoom=zoom,
+        map_style="open-street-map",
+        hover_data={'listings': True, 'Mean Price per Sqft': True, 'latitude': False, 'longitude': False},
+    )
+    fig.update_layout(height=900, width=1400)
+    st.plotly_chart(fig, use_container_width=True)
+
+    if view != "Grid cells":
+        st.dataframe(nearby.drop(columns=['latitude', 'longitude']).head(100), use_container_width=True)
+
+
 
 # =====================================================================================
 # ☁️ TAB 2 — WORDCLOUD (Updated)
 # =====================================================================================
+@st.fragment
+@timed("tab.wordcloud")
+def wordcloud_tab(wordcloud_signature):
+    import plotly.express as px
 
-with tab2:
     st.header("Sector-wise WordCloud Generator")
 
-    # Clean text columns
-    wordcloud_df['sector'] = wordcloud_df['sector'].str.lower().str.strip()
-    if 'property_type' in wordcloud_df.columns:
-        wordcloud_df['property_type'] = wordcloud_df['property_type'].str.lower().str.strip()
-
-    wordcloud_df['features'] = wordcloud_df['features'].apply(
-        lambda x: ast.literal_eval(x) if isinstance(x, str) else x
-    )
+    amenity_index = get_amenity_index(wordcloud_signature)
 
     # Filters
     col1, col2 = st.columns(2)
     with col1:
-        sectors = ["overall"] + sorted(wordcloud_df['sector'].dropna().unique())
-        selected_sector = st.selectbox("Select a Sector", sectors)
+        selected_sector = st.selectbox("Select a Sector", sector_options(amenity_index))
     with col2:
-        property_types = ["overall"]
-        if 'property_type' in wordcloud_df.columns:
-            property_types += sorted(wordcloud_df['property_type'].dropna().unique())
-        selected_property_type = st.selectbox("Select Property Type", property_types)
-
-    # Apply filters
-    sector_data = wordcloud_df.copy()
-    if selected_sector != "overall":
-        sector_data = sector_data[sector_data['sector'] == selected_sector]
-    if selected_property_type != "overall" and 'property_type' in sector_data.columns:
-        sector_data = sector_data[sector_data['property_type'] == selected_property_type]
-
-    # Build features list
-    features_list = []
-    for item in sector_data['features']:
-        if isinstance(item, list):
-            for f in item:
-                if isinstance(f, list):
-                    features_list.extend([str(x) for x in f])
-                else:
-                    features_list.append(str(f))
-
-    features_list = [f.strip() for f in features_list if f and f.strip()]
-
-    if len(features_list) == 0:
+        selected_property_type = st.selectbox("Select Property Type", property_type_options(amenity_index))
+
+    # Feature counts were precomputed per (sector, property type)
+    counts = feature_counts(amenity_index, selected_sector, selected_property_type)
+
+    if len(counts) == 0:
         st.warning("No feature words available for this selection.")
     else:
         # WordCloud
-        wc = WordCloud(width=800, height=500, background_color="white").generate(" ".join(features_list))
-        fig_wc, ax = plt.subplots(figsize=(8, 8))
-        ax.imshow(wc, interpolation="bilinear")
-        ax.axis("off")
-        st.pyplot(fig_wc)
+        st.image(render_wordcloud(wordcloud_signature, selected_sector, selected_property_type))
 
         # Top features bar chart
         st.subheader("📊 Top Features")
-        feat_counts = pd.Series(features_list).value_counts().head(20).reset_index()
-        feat_counts.columns = ['Feature', 'Count']
+        feat_counts = pd.DataFrame(list(counts.items())[:20], columns=['Feature', 'Count'])
         fig6 = px.bar(
             feat_counts,
             x='Feature',
@@ -152,126 +280,195 @@ with tab2:
 # =====================================================================================
 # 📈 TAB 3 — PRICE ANALYSIS (with sub-tabs)
 # =====================================================================================
-with tab3:
-    st.header("🏙️ Property Price Visualization Dashboard — Gurgaon")
 
-    # Clean numeric-like columns
-    for col in ['balcony', 'bathroom', 'bedRoom', 'floorNum']:
-        new_df[col] = (
-            new_df[col]
-            .astype(str)
-            .str.replace('+', '', regex=False)
-            .astype(float)
+# ---------------------------------------------------------------
+# SUB-TAB 1: SCATTER PLOTS (Updated)
+# ---------------------------------------------------------------
+@st.fragment
+@timed("tab.price.scatter")
+def scatter_subtab(viz_signature):
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    st.subheader("📈 Scatter Plots — Understand How Price Changes with Features")
+
+    property_filter = st.selectbox("Select Property Type:", ["Overall", "flat", "house"], key="scatter_filter")
+    scatter_frames, ols_fits = get_scatter_data(viz_signature)
+    df_tab = scatter_frames[property_filter]
+
+    feature_options = ['Overall', 'bathroom', 'balcony', 'floorNum', 'built_up_area', 'luxury_score', 'bedRoom']
+    x_feature = st.selectbox("Select feature to plot against Price:", feature_options)
+
+    # Large frames are binned or sampled on the server instead of shipping every point
+    large = len(df_tab) > SCATTER_POINT_LIMIT
+    if large and x_feature != "Overall":
+        render_mode = st.radio(
+            f"{len(df_tab):,} listings — choose how to render:",
+            ["Density (binned)", f"Sample ({MAX_RENDERED_POINTS:,} points)"],
+            horizontal=True,
+            key="scatter_render_mode",
+        )
+    else:
+        render_mode = "All points"
+
+    if x_feature == "Overall":
+        # Histogram bins are computed here; only 50 bars go to the browser
+        bins = histogram(df_tab[PRICE_COLUMN])
+        fig = px.bar(
+            bins,
+            x='bin_centre',
+            y='count',
+            title=f'Overall Price Distribution ({property_filter})',
+            labels={'bin_centre': 'Price (in Crores ₹)', 'count': 'count'}
+        )
+        fig.update_traces(width=bins['width'])
+        fig.update_layout(bargap=0)
+    elif render_mode.startswith("Density"):
+        x_centres, y_centres, counts = bin_points(df_tab[x_feature], df_tab[PRICE_COLUMN])
+        fig = go.Figure(go.Heatmap(
+            x=x_centres,
+            y=y_centres,
+            z=np.where(counts > 0, np.log10(np.maximum(counts, 1)), np.nan),
+            colorscale='Viridis',
+            colorbar=dict(title='log10(count)'),
+        ))
+        fig.update_layout(title=f'{x_feature} vs Price (in Crores) — {property_filter}')
+    else:
+        points = sample_points(df_tab) if large else df_tab
+        fig = px.scatter(
+            points,
+            x=x_feature,
+            y=PRICE_COLUMN,
+            color='bedRoom',
+            render_mode='webgl',
+            title=f'{x_feature} vs Price (in Crores) — {property_filter}',
+            labels={x_feature: x_feature.capitalize(), PRICE_COLUMN: 'Price (in Crores ₹)'}
+        )
+
+    if x_feature != "Overall":
+        # Cached OLS trendline: two points instead of a statsmodels refit
+        fit = ols_fits[(property_filter, x_feature)]
+        if fit is not None:
+            line_x = np.array([fit['x_min'], fit['x_max']])
+            fig.add_trace(go.Scatter(
+                x=line_x,
+                y=fit['slope'] * line_x + fit['intercept'],
+                mode='lines',
+                line=dict(color='red'),
+                name=f"OLS (R²={fit['r2']:.3f})",
+                showlegend=False,
+                hovertemplate=(
+                    f"price = {fit['slope']:.4g} × {x_feature} + {fit['intercept']:.4g}"
+                    f"<br>R² = {fit['r2']:.3f}, n = {fit['n']}<extra></extra>"
+                ),
+            ))
+        fig.update_layout(
+            xaxis_title=x_feature.capitalize(),
+            yaxis_title='Price (in Crores ₹)',
         )
 
+    st.plotly_chart(fig, use_container_width=True)
+
+
+# ---------------------------------------------------------------
+# SUB-TAB 2: KDE / DISTRIBUTION
+# ---------------------------------------------------------------
+@st.fragment
+@timed("tab.price.distribution")
+def distribution_subtab(viz_signature):
+    import matplotlib.pyplot as plt
+
+    st.subheader("📊 Price Distribution — Understand How Prices Are Spread")
+
+    property_filter = st.selectbox("Select Property Type:", ["Overall", "flat", "house"], key="kde_filter")
+
+    feature_options = ['Overall', 'bathroom', 'balcony', 'floorNum', 'built_up_area', 'luxury_score', 'bedRoom']
+    kde_feature = st.selectbox("Select feature for KDE Plot:", feature_options)
+
+    curves, ordered = get_kde_curves(viz_signature, property_filter, kde_feature)
+
+    fig_kde, ax = plt.subplots(figsize=(7, 4))
+    # Ordered levels (room counts, area ranges) get a sequential palette
+    cmap = plt.get_cmap('viridis' if ordered else 'tab10')
+    for i, (level, x, density) in enumerate(curves):
+        color = cmap(i / max(len(curves) - 1, 1)) if ordered else cmap(i % 10)
+        ax.fill_between(x, density, alpha=0.4, color=color, label=None if level is None else str(level))
+        ax.plot(x, density, color=color, linewidth=1)
+
+    if kde_feature == "Overall":
+        ax.set_title(f'Overall Price Distribution ({property_filter})')
+    else:
+        ax.set_title(f'Price Distribution by {kde_feature.capitalize()} ({property_filter})')
+        ax.legend(title=kde_feature, fontsize='small')
+
+    ax.set_xlabel("Price (₹)")
+    ax.set_ylabel("Density")
+    st.pyplot(fig_kde)
+    plt.close(fig_kde)
+
+
+# ---------------------------------------------------------------
+# SUB-TAB 3: CORRELATION
+# ---------------------------------------------------------------
+@st.fragment
+@timed("tab.price.correlation")
+def correlation_subtab(viz_signature):
+    st.subheader("🧮 Correlation Heatmap — Numeric Feature Relationships")
+
+    property_filter = st.selectbox("Select Property Type:", ["Overall", "flat", "house"], key="corr_filter")
+    corr_stats = get_correlation_stats(viz_signature)[property_filter]
+    st.image(render_correlation_heatmap(viz_signature, corr_stats.rows, property_filter))
+
+
+@st.fragment
+@timed("tab.price")
+def price_analysis_tab(viz_signature):
+    st.header("🏙️ Property Price Visualization Dashboard — Gurgaon")
+
     # --- Create Sub-Tabs ---
+    # Switching sub-tabs reruns this fragment only; each open sub-tab is a
+    # fragment of its own, so its widgets don't touch its siblings
     scatter_tab, dist_tab, corr_tab = st.tabs([
         "🔹 Price Scatter",
         "🔹 Price Distribution",
         "🔹 Correlation Analysis"
-    ])
+    ], on_change="rerun", key="price_analysis_tab")
 
-    # ---------------------------------------------------------------
-    # SUB-TAB 1: SCATTER PLOTS (Updated)
-    # ---------------------------------------------------------------
     with scatter_tab:
-        st.subheader("📈 Scatter Plots — Understand How Price Changes with Features")
+        if scatter_tab.open:
+            scatter_subtab(viz_signature)
 
-        property_filter = st.selectbox("Select Property Type:", ["Overall", "flat", "house"], key="scatter_filter")
-        if property_filter == "Overall":
-            df_tab = new_df.copy()
-        else:
-            df_tab = new_df[new_df["property_type"] == property_filter]
-
-        # Convert price into crores for readability
-        df_tab['price_crore'] = df_tab['price'] / 1e7
-
-        feature_options = ['Overall', 'bathroom', 'balcony', 'floorNum', 'built_up_area', 'luxury_score', 'bedRoom']
-        x_feature = st.selectbox("Select feature to plot against Price:", feature_options)
-
-        if x_feature == "Overall":
-            fig = px.histogram(
-                df_tab,
-                x='price_crore',
-                nbins=50,
-                title=f'Overall Price Distribution ({property_filter})',
-                labels={'price_crore': 'Price (in Crores ₹)'}
-            )
-        else:
-            fig = px.scatter(
-                df_tab,
-                x=x_feature,
-                y='price_crore',
-                color='bedRoom',
-                trendline='ols',
-                title=f'{x_feature} vs Price (in Crores) — {property_filter}',
-                labels={x_feature: x_feature.capitalize(), 'price_crore': 'Price (in Crores ₹)'}
-            )
-
-        st.plotly_chart(fig, use_container_width=True)
-
-    # ---------------------------------------------------------------
-    # SUB-TAB 2: KDE / DISTRIBUTION
-    # ---------------------------------------------------------------
     with dist_tab:
-        st.subheader("📊 Price Distribution — Understand How Prices Are Spread")
-
-        property_filter = st.selectbox("Select Property Type:", ["Overall", "flat", "house"], key="kde_filter")
-        if property_filter == "Overall":
-            df_tab = new_df.copy()
-        else:
-            df_tab = new_df[new_df["property_type"] == property_filter]
-
-        feature_options = ['Overall', 'bathroom', 'balcony', 'floorNum', 'built_up_area', 'luxury_score', 'bedRoom']
-        kde_feature = st.selectbox("Select feature for KDE Plot:", feature_options)
-
-        fig_kde, ax = plt.subplots(figsize=(7, 4))
-        if kde_feature == "Overall":
-            sns.kdeplot(data=df_tab, x='price', fill=True, alpha=0.4, ax=ax)
-            plt.title(f'Overall Price Distribution ({property_filter})')
-        else:
-            sns.kdeplot(data=df_tab, x='price', hue=kde_feature, fill=True, alpha=0.4, ax=ax)
-            plt.title(f'Price Distribution by {kde_feature.capitalize()} ({property_filter})')
-
-        plt.xlabel("Price (₹)")
-        plt.ylabel("Density")
-        st.pyplot(fig_kde)
+        if dist_tab.open:
+            distribution_subtab(viz_signature)
 
-    # ---------------------------------------------------------------
-    # SUB-TAB 3: CORRELATION
-    # ---------------------------------------------------------------
     with corr_tab:
-        st.subheader("🧮 Correlation Heatmap — Numeric Feature Relationships")
-
-        property_filter = st.selectbox("Select Property Type:", ["Overall", "flat", "house"], key="corr_filter")
-        if property_filter == "Overall":
-            df_tab = new_df.copy()
-        else:
-            df_tab = new_df[new_df["property_type"] == property_filter]
-
-        numeric_cols = df_tab.select_dtypes(include='number').columns
-        corr = df_tab[numeric_cols].corr()
-
-        fig_corr, ax = plt.subplots(figsize=(8, 6))
-        sns.heatmap(corr, annot=True, cmap='coolwarm', fmt=".2f", linewidths=0.5, ax=ax)
-        plt.title(f"Correlation Heatmap ({property_filter})")
-        st.pyplot(fig_corr)
+        if corr_tab.open:
+            correlation_subtab(viz_signature)
 
 # =====================================================================================
 # 🥧 TAB 4 — PIE CHART
 # =====================================================================================
-with tab4:
+@st.fragment
+@timed("tab.bhk_pie")
+def bhk_pie_tab(viz_signature):
+    import plotly.express as px
+
     st.header('BHK Pie Chart')
 
-    sector_options = ['overall'] + new_df['sector'].unique().tolist()
-    selected_sector2 = st.selectbox('Select Sector', sector_options)
+    bhk_cube = get_viz_data(viz_signature)[2]['bhk_counts']
+    pie_sectors = ['overall'] + sorted(bhk_cube.loc[bhk_cube['sector'] != 'overall', 'sector'].unique())
+    selected_sector2 = st.selectbox('Select Sector', pie_sectors)
 
+    # Counts per BHK come from the precomputed cube, not the listings
+    pie_data = select(bhk_cube, selected_sector2)
     if selected_sector2 == 'overall':
-        fig2 = px.pie(new_df, names='bedRoom', title='BHK Distribution (Overall)')
+        fig2 = px.pie(pie_data, names='bedRoom', values='count', title='BHK Distribution (Overall)')
     else:
         fig2 = px.pie(
-            new_df[new_df['sector'] == selected_sector2],
+            pie_data,
             names='bedRoom',
+            values='count',
             title=f'BHK Distribution — {selected_sector2}'
         )
     st.plotly_chart(fig2, use_container_width=True)
@@ -279,13 +476,73 @@ with tab4:
 # =====================================================================================
 # 📦 TAB 5 — BOX PLOT
 # =====================================================================================
-with tab5:
+@st.fragment
+@timed("tab.bhk_box")
+def bhk_box_tab(viz_signature):
+    import plotly.graph_objects as go
+
     st.header('Side-by-Side BHK Price Comparison')
 
-    fig3 = px.box(
-        new_df[new_df['bedRoom'] <= 4],
-        x='bedRoom',
-        y='price',
-        title='BHK Price Range'
-    )
+    box_type = st.selectbox('Select Property Type', ['overall', 'flat', 'house'], key='box_filter')
+
+    # Quartiles, whiskers and capped outliers are precomputed per BHK
+    box_data = select(get_viz_data(viz_signature)[2]['price_box'], property_type=box_type)
+    box_data = box_data[box_data['bedRoom'] <= 4].sort_values('bedRoom')
+
+    fig3 = go.Figure(go.Box(
+        x=box_data['bedRoom'],
+        q1=box_data['q1'],
+        median=box_data['median'],
+        q3=box_data['q3'],
+        lowerfence=box_data['lowerfence'],
+        upperfence=box_data['upperfence'],
+        mean=box_data['mean'],
+        name='price',
+        marker_color='#636EFA',
+    ))
+    outliers = box_data[['bedRoom', 'outliers']].explode('outliers').dropna()
+    fig3.add_trace(go.Scatter(
+        x=outliers['bedRoom'],
+        y=outliers['outliers'],
+        mode='markers',
+        marker=dict(color='#636EFA', size=4),
+        name='outliers',
+    ))
+    fig3.update_layout(title='BHK Price Range', xaxis_title='bedRoom', yaxis_title='price', showlegend=False)
     st.plotly_chart(fig3, use_container_width=True)
+
+# -------------------------------------------------------------------------------------
+# Create Main Tabs
+# -------------------------------------------------------------------------------------
+# Signatures are read once per full run (page load or tab switch) and handed to
+# the fragments, which reuse them on their own reruns
+viz_signature = (source_signature(VIZ_DATA_PATH), store_signature())
+wordcloud_signature = (source_signature(WORDCLOUD_DATA_PATH), store_signature())
+
+tab1, tab2, tab3, tab4, tab5 = st.tabs([
+    "🌍 Geo Price Map",
+    "☁️ WordCloud",
+    "📈 Price Analysis",
+    "🥧 BHK Pie Chart",
+    "📦 BHK Price Comparison"
+], on_change="rerun", key="analysis_tab")
+
+with tab1:
+    if tab1.open:
+        geo_map_tab(viz_signature)
+
+with tab2:
+    if tab2.open:
+        wordcloud_tab(wordcloud_signature)
+
+with tab3:
+    if tab3.open:
+        price_analysis_tab(viz_signature)
+
+with tab4:
+    if tab4.open:
+        bhk_pie_tab(viz_signature)
+
+with tab5:
+    if tab5.open:
+        bhk_box_tab(viz_signature)
@@ -0,0 +1,147 @@
+"""Headless prediction server.
+
+Loads the three pipelines once and serves them over a small HTTP/JSON API,
+without Streamlit. Concurrent requests are grouped into micro-batches before
+``model.predict`` runs.
+
+    python serve.py --port 8000 --max-batch-size 64 --max-wait-ms 5
+
+Endpoints:
+    GET  /health   -> {"status": "ok", "models": [...]}
+    GET  /metrics  -> Prometheus text format (see utils/metrics.py)
+    POST /predict  -> body is one property (JSON object) or a list of them,
+                      with the 12 input columns used by the predictor page.
+"""
+import argparse
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+from utils.batching import MicroBatcher
+from utils.config import MODEL_STORE_DIR
+from utils.manifest import load_manifest
+from utils.metrics import render_prometheus, span, start_exporters
+from utils.models import load_pipelines
+from utils.prediction import prepare_batch
+
+# Largest request body accepted, in bytes
+MAX_BODY_BYTES = 1_000_000
+
+
+# ---------------------------------------
+# REQUEST HANDLER
+# ---------------------------------------
+class PredictionHandler(BaseHTTPRequestHandler):
+    batcher = None
+    manifest = None
+    request_timeout = 30.0
+
+    def current_manifest(self):
+        if MODEL_STORE_DIR is not None:
+            # Follows the store's current version; cached until the next publish
+            return load_manifest()
+        return self.manifest
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok", "models": list(self.batcher.models)})
+        elif self.path == "/metrics":
+            body = render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/predict":
+            self._send_json(404, {"error": "not found"})
+            return
+
+        try:
+            # A malformed Content-Length is a bad request, not a dropped connection
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > MAX_BODY_BYTES:
+                self._send_json(413, {"error": "invalid body size"})
+                return
+            if length <= 0:
+                raise ValueError("invalid body size")
+            payload = json.loads(self.rfile.read(length))
+            single = isinstance(payload, dict)
+            records = [payload] if single else payload
+            if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+                raise ValueError("body must be a JSON object or a list of objects")
+            rows = prepare_batch(pd.DataFrame.from_records(records), self.current_manifest()).to_dict(orient="records")
+        except ValueError as err:
+            self._send_json(400, {"error": str(err)})
+            return
+
+        try:
+            with span("serve.predict"):
+                futures = [self.batcher.submit(row) for row in rows]
+                results = [future.result(timeout=self.request_timeout) for future in futures]
+        except Exception as err:
+            self._send_json(500, {"error": str(err)})
+            return
+
+        self._send_json(200, results[0] if single else results)
+
+    def log_message(self, format, *args):
+        # Per-request logging is too noisy at hundreds of requests per second
+        pass
+
+
+class PredictionServer(ThreadingHTTPServer):
+    # The default listen backlog of 5 drops connections under bursty partner traffic
+    request_queue_size = 256
+    daemon_threads = True
+
+
+# ---------------------------------------
+# ENTRY POINT
+# ---------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Serve the Gurgaon price models over HTTP/JSON.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    with span("load_models"):
+        models = load_pipelines()
+    if MODEL_STORE_DIR is not None:
+        # Resolve the store's current version once per batch, so a publish goes
+        # live without a restart and a batch never mixes two versions
+        models = lambda: load_pipelines(lazy=True)
+    # /metrics is served here already; this only starts the file writer / profiler if set
+    start_exporters(port=None)
+    PredictionHandler.manifest = load_manifest()
+    PredictionHandler.batcher = MicroBatcher(
+        models, max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms
+    )
+
+    server = PredictionServer((args.host, args.port), PredictionHandler)
+    print(f"Serving {', '.join(PredictionHandler.batcher.models)} on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        PredictionHandler.batcher.close()
+
+
+if __name__ == "__main__":
+    main()
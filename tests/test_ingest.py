@@ -0,0 +1,101 @@
+"""Incremental ingestion: re-ingesting a changed file replaces its earlier rows.
+
+    python -m pytest -q tests
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import ingest
+from utils.config import VIZ_DATA_PATH, WORDCLOUD_DATA_PATH
+from utils.correlation import OVERALL
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    def use(name):
+        listings = tmp_path / name
+        monkeypatch.setattr(ingest, "LISTINGS_DIR", listings)
+        monkeypatch.setattr(ingest, "AGGREGATES_PATH", listings / "_aggregates.pkl")
+        return listings
+    return use
+
+
+@pytest.fixture
+def listings_csv(tmp_path):
+    """Listing rows with a ``features`` column, so every aggregate is exercised."""
+    rows = pd.read_csv(VIZ_DATA_PATH).head(300)
+    features = pd.read_csv(WORDCLOUD_DATA_PATH)['features'].head(300)
+    return tmp_path / "new.csv", rows.assign(features=features.to_numpy())
+
+
+def write(path, frame, mtime_ns):
+    frame.to_csv(path, index=False)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def assert_same_aggregates(actual, expected):
+    assert actual.rows == expected.rows
+    pd.testing.assert_frame_equal(
+        actual.sector_means().set_index('sector').sort_index(),
+        expected.sector_means().set_index('sector').sort_index(),
+        check_like=True, rtol=1e-9,
+    )
+    keys = ['sector', 'property_type', 'bedRoom']
+    pd.testing.assert_frame_equal(
+        actual.bhk_counts.sort_values(keys).reset_index(drop=True),
+        expected.bhk_counts.sort_values(keys).reset_index(drop=True),
+        check_dtype=False,
+    )
+    non_empty = lambda index: {  # noqa: E731
+        (sector, ptype): bucket for sector, by_type in index.items() for ptype, bucket in by_type.items() if bucket
+    }
+    assert non_empty(actual.amenity_index) == non_empty(expected.amenity_index)
+    for key in expected.correlation:
+        np.testing.assert_allclose(actual.correlation[key].corr(), expected.correlation[key].corr(),
+                                   atol=1e-9, equal_nan=True)
+    assert actual.correlation[OVERALL].rows == expected.correlation[OVERALL].rows
+
+
+def test_reingesting_changed_file_replaces_its_rows(store, listings_csv):
+    path, frame = listings_csv
+    changed = frame.iloc[40:].assign(price=frame['price'].iloc[40:] * 1.5)
+
+    store("incremental")
+    aggregates = ingest.ListingAggregates()
+    write(path, frame, 1_000_000_000_000_000_000)
+    assert ingest.ingest_file(path, aggregates) == len(frame)
+    write(path, changed, 2_000_000_000_000_000_000)
+    assert ingest.ingest_file(path, aggregates) == len(changed)
+    listed = ingest.load_listings()
+
+    store("fresh")
+    expected = ingest.ListingAggregates()
+    ingest.ingest_file(path, expected)
+
+    assert len(listed) == len(changed)
+    assert_same_aggregates(aggregates, expected)
+
+
+def test_unchanged_file_is_skipped(store, listings_csv):
+    path, frame = listings_csv
+    store("incremental")
+    aggregates = ingest.ListingAggregates()
+    write(path, frame, 1_000_000_000_000_000_000)
+    ingest.ingest_file(path, aggregates)
+    assert ingest.ingest_file(path, aggregates) is None
+    assert aggregates.rows == len(frame) == len(ingest.load_listings())
+
+
+def test_changed_amenity_only_file_is_refused(store, tmp_path):
+    path = tmp_path / "amenities.csv"
+    frame = pd.read_csv(WORDCLOUD_DATA_PATH).head(100)
+    store("incremental")
+    aggregates = ingest.ListingAggregates()
+    write(path, frame, 1_000_000_000_000_000_000)
+    ingest.ingest_file(path, aggregates)
+    write(path, frame.head(50), 2_000_000_000_000_000_000)
+    with pytest.raises(ValueError, match="changed since it was ingested"):
+        ingest.ingest_file(path, aggregates)
@@ -0,0 +1,89 @@
+"""Parity of the compiled tree engine with the sklearn / XGBoost pipelines.
+
+    python -m pytest -q tests
+
+Small pipelines are fitted on ``df.pkl`` with a synthetic log-price target, so
+the tests don't need the (gitignored) deployed model artifacts.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.config import DF_PATH, FEATURE_COLUMNS
+from utils.training import make_pipeline
+from utils.tree_engine import check_parity, compile_pipeline
+
+SMALL_PARAMS = {
+    "rf": {"n_estimators": 20, "max_depth": 12},
+    "ext": {"n_estimators": 20, "max_depth": 12},
+    "xgb": {"n_estimators": 40, "max_depth": 4, "learning_rate": 0.1},
+}
+
+
+@pytest.fixture(scope="module")
+def frame():
+    return pd.read_pickle(DF_PATH)[FEATURE_COLUMNS]
+
+
+@pytest.fixture(scope="module")
+def target(frame):
+    # Deterministic log-price that depends on numeric and categorical inputs
+    rng = np.random.default_rng(0)
+    sector_effect = frame["sector"].astype("category").cat.codes.to_numpy() % 7 * 0.05
+    return (
+        np.log1p(frame["built_up_area"].to_numpy() / 1000)
+        + 0.1 * frame["bedRoom"].to_numpy()
+        + sector_effect
+        + rng.normal(0, 0.05, len(frame))
+    )
+
+
+@pytest.fixture(scope="module", params=list(SMALL_PARAMS))
+def fitted(request, frame, target):
+    name = request.param
+    pipeline = make_pipeline(name, SMALL_PARAMS[name], n_jobs=1).fit(frame, target)
+    return name, pipeline, compile_pipeline(pipeline, frame)
+
+
+def edge_rows(frame):
+    """Rows with unseen categories and missing values."""
+    rows = frame.sample(20, random_state=1).reset_index(drop=True)
+    rows.loc[0, "sector"] = "sector 999"
+    rows.loc[1, "property_type"] = "villa"
+    rows.loc[2, "agePossession"] = "unknown age"
+    rows.loc[3, "built_up_area"] = np.nan
+    rows.loc[4, "bathroom"] = np.nan
+    rows.loc[5, ["sector", "built_up_area"]] = ["sector 999", np.nan]
+    return rows
+
+
+def test_matches_pipeline_on_training_rows(fitted, frame):
+    name, pipeline, compiled = fitted
+    parity = check_parity(pipeline, compiled, frame)
+    assert parity["ok"], (name, parity)
+
+
+def test_matches_pipeline_on_single_rows(fitted, frame):
+    name, pipeline, compiled = fitted
+    for i in (0, 17, len(frame) - 1):
+        row = frame.iloc[[i]]
+        np.testing.assert_allclose(compiled.predict(row), pipeline.predict(row), rtol=1e-5, atol=1e-6)
+
+
+def test_price_scale_matches(fitted, frame):
+    name, pipeline, compiled = fitted
+    rows = frame.sample(200, random_state=2)
+    np.testing.assert_allclose(
+        np.expm1(compiled.predict(rows)), np.expm1(pipeline.predict(rows)), rtol=1e-5, atol=1e-6
+    )
+
+
+@pytest.mark.filterwarnings("ignore:Found unknown categories")
+def test_unknown_categories_and_missing_values(fitted, frame):
+    name, pipeline, compiled = fitted
+    rows = edge_rows(frame)
+    expected = np.asarray(pipeline.predict(rows), dtype=np.float64)
+    actual = compiled.predict(rows)
+    assert np.isfinite(actual).all()
+    np.testing.assert_allclose(actual, expected, rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(np.expm1(actual), np.expm1(expected), rtol=1e-5, atol=1e-6)
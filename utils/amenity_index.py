@@ -0,0 +1,115 @@
+"""Pre-tokenized amenity counts for the sector WordCloud tab.
+
+Feature names are counted once per (sector, property_type), together with the
+"overall" roll-ups, and stored as JSON under ``datasets/.cache``. Switching
+filters in the dashboard is then a dictionary lookup.
+"""
+import json
+
+from utils.config import WORDCLOUD_DATA_PATH
+from utils.data_layer import CACHE_DIR, load_wordcloud_data, source_signature
+from utils.metrics import count_cache, span
+
+OVERALL = "overall"
+INDEX_PATH = CACHE_DIR / "amenity_index.json"
+
+
+# ---------------------------------------
+# BUILD
+# ---------------------------------------
+def build_amenity_index(wordcloud_df):
+    """Return ``{sector: {property_type: {feature: count}}}`` including roll-ups.
+
+    ``"overall"`` is used as the sector and/or property type key for the totals,
+    matching the dashboard's filter options.
+    """
+    df = wordcloud_df.dropna(subset=['sector'])
+    if 'property_type' not in df.columns:
+        df = df.assign(property_type=OVERALL)
+    exploded = df[['sector', 'property_type', 'features']].explode('features').dropna(subset=['features'])
+    counts = exploded.groupby(['sector', 'property_type', 'features']).size()
+
+    index = {}
+    # Every sector/type present gets an entry, even if none of its rows list features
+    for sector, property_type in df[['sector', 'property_type']].dropna().drop_duplicates().itertuples(index=False):
+        for s_key, t_key in ((sector, property_type), (sector, OVERALL), (OVERALL, property_type)):
+            index.setdefault(s_key, {}).setdefault(t_key, {})
+    index.setdefault(OVERALL, {}).setdefault(OVERALL, {})
+
+    def add(sector, property_type, feature, count):
+        bucket = index.setdefault(sector, {}).setdefault(property_type, {})
+        bucket[feature] = bucket.get(feature, 0) + int(count)
+
+    for (sector, property_type, feature), count in counts.items():
+        add(sector, property_type, feature, count)
+        add(sector, OVERALL, feature, count)
+        add(OVERALL, property_type, feature, count)
+        add(OVERALL, OVERALL, feature, count)
+
+    # Sort each bucket by count so "top N" is a slice
+    for by_type in index.values():
+        for property_type, bucket in by_type.items():
+            by_type[property_type] = dict(sorted(bucket.items(), key=lambda kv: -kv[1]))
+    return index
+
+
+def merge_amenity_index(index, other, sign=1):
+    """Add (``sign=-1``: subtract) the counts of ``other`` into a copy of ``index``.
+
+    Both come from ``build_amenity_index``; features whose count drops to zero
+    are removed.
+    """
+    merged = {sector: {ptype: dict(bucket) for ptype, bucket in by_type.items()} for sector, by_type in index.items()}
+    for sector, by_type in other.items():
+        for property_type, bucket in by_type.items():
+            target = merged.setdefault(sector, {}).setdefault(property_type, {})
+            for feature, count in bucket.items():
+                target[feature] = target.get(feature, 0) + sign * count
+    for by_type in merged.values():
+        for property_type, bucket in by_type.items():
+            kept = (kv for kv in bucket.items() if kv[1] > 0)
+            by_type[property_type] = dict(sorted(kept, key=lambda kv: -kv[1]))
+    return merged
+
+
+# ---------------------------------------
+# LOAD
+# ---------------------------------------
+def load_amenity_index():
+    """Load the index, rebuilding it when ``word_cloud_data.csv`` has changed."""
+    signature = list(source_signature(WORDCLOUD_DATA_PATH))
+    if INDEX_PATH.exists():
+        with span("load.amenity_index"):
+            stored = json.loads(INDEX_PATH.read_text())
+        if stored.get("source_signature") == signature:
+            count_cache("amenity_index", hit=True)
+            return stored["counts"]
+
+    count_cache("amenity_index", hit=False)
+    wordcloud_df = load_wordcloud_data()
+    with span("build.amenity_index"):
+        counts = build_amenity_index(wordcloud_df)
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = INDEX_PATH.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({"source_signature": signature, "counts": counts}))
+        tmp_path.replace(INDEX_PATH)
+    except OSError:
+        pass
+    return counts
+
+
+# ---------------------------------------
+# LOOKUPS
+# ---------------------------------------
+def feature_counts(index, sector=OVERALL, property_type=OVERALL):
+    """Feature -> count for one filter combination, most common first."""
+    return index.get(sector, {}).get(property_type, {})
+
+
+def sector_options(index):
+    return [OVERALL] + sorted(s for s in index if s != OVERALL)
+
+
+def property_type_options(index):
+    return [OVERALL] + sorted(t for t in index.get(OVERALL, {}) if t != OVERALL)
@@ -0,0 +1,105 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import pandas as pd
+
+from utils.config import FEATURE_COLUMNS
+from utils.prediction import ensemble_range, predict_all
+
+
+# ---------------------------------------
+# MICRO-BATCHING QUEUE
+# ---------------------------------------
+class MicroBatcher:
+    """Collect single-row requests into small batches before calling the models.
+
+    A worker thread waits for the first queued row, then keeps gathering rows until
+    either ``max_batch_size`` rows are queued or ``max_wait_ms`` has passed since
+    that first row. The batch is scored with one ``predict`` per model and each
+    caller's ``Future`` gets its own row back.
+
+    ``models`` is a dict of models, or a function returning one that is called
+    once per batch (the server passes one that follows the shared model store).
+    """
+
+    def __init__(self, models, max_batch_size=64, max_wait_ms=5.0):
+        self._models = models
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._stopped = threading.Event()
+        self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._worker.start()
+
+    @property
+    def models(self):
+        return self._models() if callable(self._models) else self._models
+
+    def submit(self, row):
+        """Queue one prepared 12-column row (a dict or Series) and return a Future."""
+        if self._stopped.is_set():
+            raise RuntimeError("MicroBatcher is closed")
+        future = Future()
+        self._queue.put((row, future))
+        return future
+
+    def predict(self, row, timeout=None):
+        return self.submit(row).result(timeout=timeout)
+
+    def close(self):
+        self._stopped.set()
+        self._queue.put(None)
+        self._worker.join()
+
+    # -----------------------------------
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # Finish the current batch, then let the next _collect stop the loop
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _score(self, batch):
+        frame = pd.DataFrame([row for row, _ in batch], columns=FEATURE_COLUMNS)
+        predictions = predict_all(self.models, frame)
+        ensemble_low, ensemble_high = ensemble_range(predictions)
+        results = []
+        for i in range(len(batch)):
+            result = {
+                name: {"low": float(p["low"][i]), "high": float(p["high"][i])}
+                for name, p in predictions.items()
+            }
+            result["ensemble"] = {"low": float(ensemble_low[i]), "high": float(ensemble_high[i])}
+            results.append(result)
+        return results
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            futures = [future for _, future in batch]
+            try:
+                results = self._score(batch)
+            except Exception as err:
+                for future in futures:
+                    future.set_exception(err)
+                continue
+            for future, result in zip(futures, results):
+                future.set_result(result)
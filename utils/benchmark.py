@@ -0,0 +1,351 @@
+"""Headless benchmarks for the predictor and the analytics dashboard.
+
+    python -m utils.benchmark                          # all scales, print table
+    python -m utils.benchmark --scales 1 10 -o before.json
+    python -m utils.benchmark --compare before.json    # run now, diff against a saved run
+    python -m utils.benchmark --compare before.json after.json
+
+Times model loading, single-row and batch ``predict`` for each pipeline, and the
+data prep and figure construction behind every dashboard tab. Each step runs on
+the real CSVs (scale 1) and on synthetic copies with 10x, 100x and 1000x the
+rows, resampled so sector/BHK mixes match the originals. Nothing touches
+Streamlit, so runs are comparable across machines and CI.
+"""
+import argparse
+import io
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from utils.config import DF_PATH, FEATURE_COLUMNS, MODEL_FILES, VIZ_DATA_PATH, WORDCLOUD_DATA_PATH
+
+DEFAULT_SCALES = [1, 10, 100, 1000]
+# Batch predict is capped so 1000x doesn't mean scoring millions of rows per model
+MAX_BATCH_ROWS = 1_000_000
+# Single-row predicts are fast and noisy, so they get more runs
+SINGLE_ROW_REPEAT = 20
+# A step is a regression when it slows down by more than this fraction...
+REGRESSION_THRESHOLD = 0.20
+# ...and by more than this many seconds (ignores noise on sub-millisecond steps)
+MIN_REGRESSION_SECONDS = 0.005
+
+
+# ---------------------------------------
+# SYNTHETIC DATA
+# ---------------------------------------
+def scale_rows(df, factor, seed=0):
+    """Resample ``df`` with replacement to ``factor`` times its length.
+
+    Rows are drawn whole, so the joint sector / property type / BHK distribution
+    matches the source.
+    """
+    if factor == 1:
+        return df
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(df), size=len(df) * factor)
+    return df.iloc[picks].reset_index(drop=True)
+
+
+def scale_viz_data(raw, factor, seed=0):
+    """Scaled copy of raw ``data_viz1.csv`` rows with jittered prices and areas.
+
+    Jitter keeps the copies from being exact duplicates, which would make KDE
+    bandwidths and scatter densities unrealistically tight.
+    """
+    df = scale_rows(raw, factor, seed)
+    if factor == 1:
+        return df
+    rng = np.random.default_rng(seed + 1)
+    df = df.copy()
+    for col in ['price', 'built_up_area']:
+        values = pd.to_numeric(df[col], errors='coerce')
+        df[col] = values * rng.lognormal(0.0, 0.05, size=len(df))
+    df['price_per_sqft'] = (df['price'] * 1e7 / df['built_up_area']).round()
+    return df
+
+
+# ---------------------------------------
+# TIMING
+# ---------------------------------------
+def measure(func, repeat=3):
+    """Median and best wall time of ``repeat`` calls to ``func``."""
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        runs.append(time.perf_counter() - start)
+    return {"median_s": statistics.median(runs), "min_s": min(runs), "runs": repeat}
+
+
+def _record(results, group, step, scale, rows, func, repeat):
+    timing = measure(func, repeat)
+    results.append({"group": group, "step": step, "scale": scale, "rows": rows, **timing})
+    print(f"  {group:<12} {step:<24} x{scale:<5} {timing['median_s']:.4f} s", file=sys.stderr)
+
+
+def _png(fig):
+    import matplotlib.pyplot as plt
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", bbox_inches="tight")
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+# ---------------------------------------
+# PREDICTOR
+# ---------------------------------------
+def bench_models(results, scales, engine=None, repeat=3, max_batch_rows=MAX_BATCH_ROWS):
+    """Load, single-row and batch predict timings; skipped if artifacts are missing."""
+    from utils.manifest import load_manifest
+    from utils.models import load_pipeline, load_pipelines, model_version
+
+    def load_models():
+        # Same work as the predictor page's load_models, but loading eagerly
+        load_manifest()
+        models = load_pipelines(engine=engine)
+        model_version()
+        return models
+
+    try:
+        models = load_models()
+    except FileNotFoundError as err:
+        print(f"Skipping model benchmarks: {err}", file=sys.stderr)
+        return
+
+    _record(results, "models", "load_models", 1, None, load_models, repeat)
+    if engine != "compiled":
+        for name in MODEL_FILES:
+            _record(results, "models", f"load {name}", 1, None, lambda name=name: load_pipeline(name), repeat)
+
+    inputs = pd.read_pickle(DF_PATH)[FEATURE_COLUMNS]
+    row = inputs.iloc[[0]]
+    for name, model in models.items():
+        model.predict(row)  # warm-up: lazy imports, first-call allocations
+        _record(results, "models", f"predict {name} 1 row", 1, 1,
+                lambda model=model: model.predict(row), SINGLE_ROW_REPEAT)
+
+    for scale in scales:
+        batch = scale_rows(inputs, scale).iloc[:max_batch_rows]
+        for name, model in models.items():
+            _record(results, "models", f"predict {name} batch", scale, len(batch),
+                    lambda model=model: model.predict(batch), repeat)
+
+
+# ---------------------------------------
+# DASHBOARD TABS
+# ---------------------------------------
+def bench_viz_tabs(results, raw, scale, repeat=3):
+    """Prep and figure steps for the geo, price analysis, pie and box tabs."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import plotly.express as px
+    import plotly.graph_objects as go
+    import seaborn as sns
+
+    from utils.correlation import build_correlation_stats
+    from utils.data_layer import clean_viz_data, sector_means
+    from utils.kde import kde_curves
+    from utils.scatter import PRICE_COLUMN, bin_points, build_ols_fits, build_scatter_frames, histogram
+    from utils.summaries import bhk_counts, price_box_stats, select
+
+    raw = scale_viz_data(raw, scale)
+    rows = len(raw)
+    df = clean_viz_data(raw)
+
+    def record(group, step, func):
+        _record(results, group, step, scale, rows, func, repeat)
+
+    record("data", "clean_viz_data", lambda: clean_viz_data(raw))
+
+    # Geo map
+    group_df = sector_means(df)
+    record("geo", "prep", lambda: sector_means(df))
+    record("geo", "figure", lambda: px.scatter_map(
+        group_df.dropna(subset=['latitude', 'longitude']), lat="latitude", lon="longitude",
+        color='price_per_sqft', size='built_up_area', zoom=10, map_style="open-street-map",
+        hover_name='sector',
+    ))
+
+    # Price scatter
+    frames = build_scatter_frames(df)
+    record("scatter", "prep", lambda: build_ols_fits(build_scatter_frames(df)))
+    record("scatter", "figure histogram", lambda: px.bar(histogram(frames['Overall'][PRICE_COLUMN]),
+                                                         x='bin_centre', y='count'))
+
+    def density_figure():
+        x, y, counts = bin_points(frames['Overall']['built_up_area'], frames['Overall'][PRICE_COLUMN])
+        return go.Figure(go.Heatmap(x=x, y=y, z=np.log10(np.maximum(counts, 1))))
+
+    record("scatter", "figure density", density_figure)
+
+    # Price distribution
+    record("kde", "prep overall", lambda: kde_curves(df, 'price'))
+    record("kde", "prep by bedRoom", lambda: kde_curves(df, 'price', 'bedRoom'))
+    curves, _ = kde_curves(df, 'price', 'bedRoom')
+
+    def kde_figure():
+        fig, ax = plt.subplots(figsize=(7, 4))
+        for level, x, density in curves:
+            ax.fill_between(x, density, alpha=0.4, label=str(level))
+        return _png(fig)
+
+    record("kde", "figure", kde_figure)
+
+    # Correlation
+    record("correlation", "prep", lambda: build_correlation_stats(df))
+    corr = build_correlation_stats(df)['Overall'].corr()
+
+    def heatmap_figure():
+        fig, ax = plt.subplots(figsize=(8, 6))
+        sns.heatmap(corr, annot=True, cmap='coolwarm', fmt=".2f", linewidths=0.5, ax=ax)
+        return _png(fig)
+
+    record("correlation", "figure", heatmap_figure)
+
+    # BHK pie and box plot
+    record("pie", "prep", lambda: bhk_counts(df))
+    pie_data = select(bhk_counts(df))
+    record("pie", "figure", lambda: px.pie(pie_data, names='bedRoom', values='count'))
+
+    record("box", "prep", lambda: price_box_stats(df))
+    box_data = select(price_box_stats(df))
+    record("box", "figure", lambda: go.Figure(go.Box(
+        x=box_data['bedRoom'], q1=box_data['q1'], median=box_data['median'], q3=box_data['q3'],
+        lowerfence=box_data['lowerfence'], upperfence=box_data['upperfence'], mean=box_data['mean'],
+    )))
+
+
+def bench_wordcloud_tab(results, raw, scale, repeat=3):
+    """Cleaning, amenity index build and WordCloud rendering."""
+    import plotly.express as px
+    from wordcloud import WordCloud
+
+    from utils.amenity_index import build_amenity_index, feature_counts
+    from utils.data_layer import clean_wordcloud_data
+
+    raw = scale_rows(raw, scale)
+    rows = len(raw)
+    df = clean_wordcloud_data(raw)
+
+    def record(step, func):
+        _record(results, "wordcloud", step, scale, rows, func, repeat)
+
+    record("clean_wordcloud_data", lambda: clean_wordcloud_data(raw))
+    record("prep", lambda: build_amenity_index(df))
+    counts = feature_counts(build_amenity_index(df), 'overall', 'overall')
+
+    def wordcloud_figure():
+        wc = WordCloud(width=800, height=500, background_color="white").generate_from_frequencies(counts)
+        wc.to_image().save(io.BytesIO(), format="PNG")
+
+    record("figure", wordcloud_figure)
+    top = pd.DataFrame(list(counts.items())[:20], columns=['Feature', 'Count'])
+    record("figure top20", lambda: px.bar(top, x='Feature', y='Count', text='Count'))
+
+
+# ---------------------------------------
+# RUN / REPORT
+# ---------------------------------------
+def run_benchmarks(scales=DEFAULT_SCALES, repeat=3, engine=None, skip_models=False,
+                   max_batch_rows=MAX_BATCH_ROWS):
+    """Run every benchmark and return a JSON-ready report."""
+    results = []
+    if not skip_models:
+        bench_models(results, scales, engine, repeat, max_batch_rows)
+
+    viz_raw = pd.read_csv(VIZ_DATA_PATH)
+    wordcloud_raw = pd.read_csv(WORDCLOUD_DATA_PATH)
+    for scale in scales:
+        bench_viz_tabs(results, viz_raw, scale, repeat)
+        bench_wordcloud_tab(results, wordcloud_raw, scale, repeat)
+
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "engine": engine,
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def results_table(report):
+    table = pd.DataFrame(report["results"])
+    if table.empty:
+        return table
+    table["rows"] = table["rows"].astype("Int64")
+    return table[["group", "step", "scale", "rows", "median_s", "min_s"]]
+
+
+def compare_reports(base, new, threshold=REGRESSION_THRESHOLD):
+    """Join two reports on (group, step, scale) and flag slowdowns."""
+    keys = ["group", "step", "scale"]
+    old = pd.DataFrame(base["results"])[keys + ["median_s"]]
+    cur = pd.DataFrame(new["results"])[keys + ["median_s"]]
+    merged = old.merge(cur, on=keys, how="outer", suffixes=("_base", "_new"))
+    merged["ratio"] = merged["median_s_new"] / merged["median_s_base"]
+    merged["regression"] = (
+        (merged["ratio"] > 1 + threshold)
+        & (merged["median_s_new"] - merged["median_s_base"] > MIN_REGRESSION_SECONDS)
+    )
+    return merged
+
+
+def _load_report(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark model serving and dashboard tabs.")
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES,
+                        help="Dataset size multipliers (default: 1 10 100 1000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per step (median is reported)")
+    parser.add_argument("--engine", choices=["pipeline", "compiled"], default=None,
+                        help="Model engine (default: GURGAON_MODEL_ENGINE)")
+    parser.add_argument("--skip-models", action="store_true", help="Only benchmark the dashboard")
+    parser.add_argument("--max-batch-rows", type=int, default=MAX_BATCH_ROWS,
+                        help="Cap on rows per batch predict")
+    parser.add_argument("-o", "--output", help="Write the report as JSON to this path")
+    parser.add_argument("--compare", nargs="+", metavar="REPORT",
+                        help="BASE [NEW]: compare NEW (or a fresh run) against BASE")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="Slowdown fraction counted as a regression (default: 0.2)")
+    args = parser.parse_args()
+
+    if args.compare and len(args.compare) > 2:
+        parser.error("--compare takes one or two reports")
+
+    if args.compare and len(args.compare) == 2:
+        report = _load_report(args.compare[1])
+    else:
+        report = run_benchmarks(args.scales, args.repeat, args.engine, args.skip_models,
+                                args.max_batch_rows)
+        print(results_table(report).to_string(index=False, na_rep="-", float_format="{:.4f}".format))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+    if args.compare:
+        diff = compare_reports(_load_report(args.compare[0]), report, args.threshold)
+        print()
+        print(diff.to_string(index=False, na_rep="-", float_format="{:.4f}".format))
+        regressions = diff[diff["regression"]]
+        if len(regressions):
+            print(f"\n{len(regressions)} step(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+        print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
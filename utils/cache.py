@@ -0,0 +1,84 @@
+import threading
+import time
+from collections import OrderedDict
+
+from utils.config import FEATURE_COLUMNS, NUMERIC_COLUMNS
+
+
+# ---------------------------------------
+# PREDICTION CACHE
+# ---------------------------------------
+def make_key(row, model_version):
+    """Build a hashable cache key from one input row (dict or Series).
+
+    Numeric fields are rounded so 1200 and 1200.0 hit the same entry, and text
+    fields are stripped/lower-cased so trivially different spellings do too.
+    """
+    values = []
+    for col in FEATURE_COLUMNS:
+        value = row[col]
+        if col in NUMERIC_COLUMNS:
+            values.append(round(float(value), 4))
+        else:
+            values.append(str(value).strip().lower())
+    return (model_version, tuple(values))
+
+
+class PredictionCache:
+    """Thread-safe LRU cache with a time-to-live, plus hit/miss counters.
+
+    One instance is meant to be shared by every session of the app, so all
+    methods take a lock.
+    """
+
+    def __init__(self, maxsize=4096, ttl_seconds=3600.0):
+        self.maxsize = maxsize
+        self.ttl = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, value = entry
+            if self.ttl is not None and now - stored_at > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
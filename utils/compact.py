@@ -0,0 +1,245 @@
+"""Smaller variants of the deployed tree ensembles.
+
+    python -m utils.compact                        # report + save rf/ext/xgb variants
+    python -m utils.compact rf --trees 0.5 --max-depth 14
+    python -m utils.compact --report-only --data train.pkl
+
+A compact variant is a compiled pipeline (see ``utils/tree_engine.py``) with:
+
+* only the first ``trees`` fraction of the ensemble's trees
+* sklearn trees cut at ``max_depth`` (the cut node's mean becomes the leaf value)
+* float32 thresholds and values, with unreachable nodes dropped
+* compressed ``joblib`` serialization
+
+Thresholds are rounded *down* to float32, so a cut-free, all-trees variant
+sends every row down the same paths as the original; only the float32 leaf
+values differ (around 1e-7). Set ``GURGAON_MODEL_VARIANT=compact`` to
+serve the ``*_compact.joblib`` files.
+
+The report compares each variant to the full pipeline on a holdout sample of
+``df.pkl``. ``df.pkl`` has no prices, so accuracy there means fidelity: the
+MAE and R² against the full model's prices. Pass ``--data`` with a frame
+that has ``price`` to also score against the actual prices.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.tree_engine import CompiledPipeline, TreeArrays, compile_pipeline
+
+DEFAULT_TREE_FRACTION = 0.5
+DEFAULT_MAX_DEPTH = 16
+DEFAULT_COMPRESS = 3
+HOLDOUT_FRACTION = 0.2
+SEED = 42
+# (tree fraction, max depth) pairs in the report; depth cuts skip XGBoost
+REPORT_GRID = [(1.0, None), (0.5, None), (1.0, 16), (0.5, 16), (0.5, 12), (0.25, 12)]
+
+
+# ---------------------------------------
+# SHRINKING TREE ARRAYS
+# ---------------------------------------
+def _float32_down(threshold):
+    """Largest float32 <= each threshold, so ``x <= t`` is unchanged for float32 x."""
+    rounded = threshold.astype(np.float32)
+    over = rounded.astype(np.float64) > threshold
+    rounded[over] = np.nextafter(rounded[over], np.float32(-np.inf))
+    return rounded
+
+
+def shrink_trees(trees, tree_fraction=1.0, max_depth=None):
+    """Return a new ``TreeArrays`` with fewer trees, a depth cut and float32 nodes."""
+    if max_depth is not None and trees.aggregate != "mean":
+        # Boosted trees store values at the leaves only, so a cut node has no value
+        raise ValueError("max_depth can only be applied to averaged (sklearn) ensembles")
+
+    n_trees = max(1, int(round(trees.n_trees * tree_fraction)))
+    roots = trees.roots[:n_trees]
+
+    # Walk level by level from the kept roots; nodes at the cut depth become leaves
+    levels, leaf_levels = [], []
+    frontier, depth = roots, 0
+    while frontier.size:
+        levels.append(frontier)
+        cut = np.full(frontier.size, max_depth is not None and depth >= max_depth)
+        is_leaf = trees.is_leaf[frontier] | cut
+        leaf_levels.append(is_leaf)
+        inner = frontier[~is_leaf]
+        frontier = np.concatenate([trees.left[inner], trees.right[inner]])
+        depth += 1
+
+    kept = np.concatenate(levels)
+    leaf = np.concatenate(leaf_levels)
+    new_index = np.full(trees.n_nodes, -1, dtype=np.int32)
+    new_index[kept] = np.arange(kept.size, dtype=np.int32)
+    own = np.arange(kept.size, dtype=np.int32)
+
+    feature = np.where(leaf, 0, trees.feature[kept]).astype(np.int32)
+    threshold = _float32_down(np.where(leaf, np.inf, trees.threshold[kept]))
+    left = np.where(leaf, own, new_index[trees.left[kept]]).astype(np.int32)
+    right = np.where(leaf, own, new_index[trees.right[kept]]).astype(np.int32)
+    return TreeArrays(
+        feature, threshold, left, right,
+        trees.value[kept].astype(np.float32),
+        trees.missing_left[kept],
+        new_index[roots],
+        len(levels) - 1,
+        trees.aggregate,
+        trees.base_score,
+    )
+
+
+def compact_pipeline(compiled, tree_fraction=DEFAULT_TREE_FRACTION, max_depth=DEFAULT_MAX_DEPTH):
+    """Compact copy of a ``CompiledPipeline``; depth cuts are skipped for boosted models."""
+    if compiled.trees.aggregate != "mean":
+        max_depth = None
+    trees = shrink_trees(compiled.trees, tree_fraction, max_depth)
+    return CompiledPipeline(compiled.input_columns, compiled.blocks, compiled.post_blocks, trees, compiled.source)
+
+
+def nbytes(compiled):
+    trees = compiled.trees
+    return sum(getattr(trees, name).nbytes for name in
+               ("feature", "threshold", "left", "right", "value", "missing_left", "roots", "is_leaf"))
+
+
+def compact_path(name):
+    from utils.config import MODELS_DIR, MODEL_FILES
+
+    return MODELS_DIR / MODEL_FILES[name].replace(".pkl", "_compact.joblib")
+
+
+def save_compact(model, path, compress=DEFAULT_COMPRESS):
+    """Dump atomically; ``compress=0`` keeps the file memory-mappable instead."""
+    import joblib
+
+    tmp_path = path.with_suffix(".tmp")
+    joblib.dump(model, tmp_path, compress=compress)
+    tmp_path.replace(path)
+    return path.stat().st_size
+
+
+# ---------------------------------------
+# REPORT
+# ---------------------------------------
+def holdout_sample(frame, fraction=HOLDOUT_FRACTION, seed=SEED):
+    return frame.sample(frac=fraction, random_state=seed)
+
+
+def _latency_ms(model, frame, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        model.predict(frame)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def _serialized_size(model, compress):
+    import io
+
+    import joblib
+
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer, compress=compress)
+    return buffer.tell()
+
+
+def _accuracy(predicted_log, reference_price, prefix):
+    from sklearn.metrics import mean_absolute_error, r2_score
+
+    price = np.expm1(np.asarray(predicted_log, dtype=np.float64))
+    return {
+        f"{prefix}_mae": float(mean_absolute_error(reference_price, price)),
+        f"{prefix}_r2": float(r2_score(reference_price, price)),
+    }
+
+
+def variant_report(name, pipeline, compiled, holdout, prices=None, grid=REPORT_GRID,
+                   compress=DEFAULT_COMPRESS):
+    """One row per variant: size, memory, latency and accuracy against the full model."""
+    full_price = np.expm1(np.asarray(pipeline.predict(holdout), dtype=np.float64))
+    single = holdout.iloc[[0]]
+    rows = []
+
+    def add(label, model, trees, depth, file_bytes, memory_bytes):
+        predicted = model.predict(holdout)
+        row = {
+            "model": name, "variant": label, "trees": trees, "max_depth": depth,
+            "file_mb": file_bytes / 1e6, "memory_mb": None if memory_bytes is None else memory_bytes / 1e6,
+            "single_ms": _latency_ms(model, single, 20),
+            "batch_ms": _latency_ms(model, holdout, 3),
+            **_accuracy(predicted, full_price, "fidelity"),
+        }
+        if prices is not None:
+            row.update(_accuracy(predicted, prices, "holdout"))
+        rows.append(row)
+
+    add("pipeline", pipeline, compiled.trees.n_trees, compiled.trees.max_depth,
+        _serialized_size(pipeline, 0), None)
+    seen = set()
+    for fraction, depth in grid:
+        if compiled.trees.aggregate != "mean":
+            depth = None
+        if (fraction, depth) in seen:
+            continue
+        seen.add((fraction, depth))
+        variant = compact_pipeline(compiled, fraction, depth)
+        add(f"compact {fraction:g}x" + (f" d{depth}" if depth else ""), variant,
+            variant.trees.n_trees, variant.trees.max_depth,
+            _serialized_size(variant, compress), nbytes(variant))
+    return pd.DataFrame(rows)
+
+
+def main():
+    from pathlib import Path
+
+    from utils.config import DF_PATH, FEATURE_COLUMNS, MODEL_FILES
+    from utils.models import load_pipeline, source_fingerprint
+
+    parser = argparse.ArgumentParser(description="Build compact variants of the tree pipelines.")
+    parser.add_argument("models", nargs="*", default=list(MODEL_FILES), help="Short model names")
+    parser.add_argument("--trees", type=float, default=DEFAULT_TREE_FRACTION,
+                        help="Fraction of trees to keep in the saved variant")
+    parser.add_argument("--max-depth", type=int, default=DEFAULT_MAX_DEPTH,
+                        help="Depth cut for sklearn ensembles in the saved variant (0 = none)")
+    parser.add_argument("--compress", type=int, default=DEFAULT_COMPRESS,
+                        help="joblib compression level; 0 saves an mmap-friendly file")
+    parser.add_argument("--data", type=Path, default=None,
+                        help="Frame with 'price' to score the holdout against real prices")
+    parser.add_argument("--report-only", action="store_true", help="Print the report without saving")
+    parser.add_argument("--no-report", action="store_true", help="Save without building the report")
+    args = parser.parse_args()
+
+    reference = pd.read_pickle(DF_PATH)
+    if args.data is not None:
+        from utils.training import load_training_data
+
+        features, log_price = load_training_data(args.data)
+        frame = features.assign(_price=np.expm1(log_price))
+    else:
+        frame = reference[FEATURE_COLUMNS]
+    holdout = holdout_sample(frame)
+    prices = holdout.pop("_price").to_numpy() if "_price" in holdout else None
+
+    reports = []
+    for name in args.models:
+        pipeline = load_pipeline(name)
+        compiled = compile_pipeline(pipeline, reference)
+        compiled.source = source_fingerprint(name)
+        if not args.no_report:
+            reports.append(variant_report(name, pipeline, compiled, holdout, prices, compress=args.compress))
+        if not args.report_only:
+            variant = compact_pipeline(compiled, args.trees, args.max_depth or None)
+            size = save_compact(variant, compact_path(name), args.compress)
+            print(f"{name}: saved {compact_path(name)} ({variant.trees.n_trees} trees, "
+                  f"depth {variant.trees.max_depth}, {size / 1e6:.1f} MB)")
+
+    if reports:
+        report = pd.concat(reports, ignore_index=True)
+        print()
+        print(report.to_string(index=False, na_rep="-", float_format="{:.4g}".format))
+
+
+if __name__ == "__main__":
+    main()
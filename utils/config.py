@@ -0,0 +1,84 @@
+import os
+from pathlib import Path
+
+# ---------------------------------------
+# PROJECT PATHS
+# ---------------------------------------
+# Everything is resolved relative to the project root so the app runs the same
+# locally and inside the Docker image. Each directory can be overridden with an
+# environment variable for deployments that keep artifacts elsewhere.
+BASE_DIR = Path(__file__).resolve().parent.parent
+DATASETS_DIR = Path(os.environ.get("GURGAON_DATASETS_DIR", BASE_DIR / "datasets"))
+MODELS_DIR = Path(os.environ.get("GURGAON_MODELS_DIR", BASE_DIR / "models"))
+
+DF_PATH = DATASETS_DIR / "df.pkl"
+VIZ_DATA_PATH = DATASETS_DIR / "data_viz1.csv"
+WORDCLOUD_DATA_PATH = DATASETS_DIR / "word_cloud_data.csv"
+
+# ---------------------------------------
+# MODELS
+# ---------------------------------------
+# Short name -> pickled pipeline file inside MODELS_DIR
+MODEL_FILES = {
+    "rf": "RANDOM_FOREST_pipeline.pkl",
+    "xgb": "XGB_full_pipeline.pkl",
+    "ext": "EXTRA_TREES_full_pipeline.pkl",
+}
+
+# "pipeline" serves the pickled sklearn/XGBoost pipelines as-is, "compiled" uses
+# the flat-array tree engine in utils/tree_engine.py
+MODEL_ENGINE = os.environ.get("GURGAON_MODEL_ENGINE", "pipeline")
+
+# "full" serves the artifacts above; "compact" serves the reduced *_compact.joblib
+# variants written by utils/compact.py (falling back to full where missing)
+MODEL_VARIANT = os.environ.get("GURGAON_MODEL_VARIANT", "full")
+
+# joblib mmap_mode for model artifacts: arrays stored in joblib's format are paged
+# in from disk on demand instead of copied into each process. "" disables it.
+MODEL_MMAP_MODE = os.environ.get("GURGAON_MODEL_MMAP", "r") or None
+
+# Shared model store for multi-worker nodes (see utils/model_store.py), e.g.
+# /dev/shm/gurgaon-models. When set, workers serve whatever version its
+# "current" pointer names instead of loading MODELS_DIR themselves.
+MODEL_STORE_DIR = Path(os.environ["GURGAON_MODEL_STORE"]) if os.environ.get("GURGAON_MODEL_STORE") else None
+
+MODEL_LABELS = {
+    "rf": "🌲 Random Forest",
+    "xgb": "⚡ XGBoost",
+    "ext": "🌳 Extra Trees",
+}
+
+# Weights for the combined estimate, proportional to each model's R² score
+ENSEMBLE_WEIGHTS = {
+    "rf": 0.8327,
+    "xgb": 0.90,
+    "ext": 0.90,
+}
+
+# ---------------------------------------
+# MODEL INPUT
+# ---------------------------------------
+# Column order the pipelines were trained on
+FEATURE_COLUMNS = [
+    'property_type', 'sector', 'bedRoom', 'bathroom', 'balcony',
+    'agePossession', 'built_up_area', 'servant room', 'store room',
+    'furnishing_type', 'luxury_category', 'floor_category'
+]
+
+NUMERIC_COLUMNS = ['bedRoom', 'bathroom', 'built_up_area', 'servant room', 'store room']
+
+# ± margin (in Cr) applied around every point prediction
+PRICE_MARGIN = 0.22
+
+# ---------------------------------------
+# METRICS
+# ---------------------------------------
+# Port for the Prometheus /metrics endpoint (unset = no endpoint)
+METRICS_PORT = int(os.environ.get("GURGAON_METRICS_PORT") or 0) or None
+# Interface for that endpoint; /profile exposes stack dumps, so local only by default
+METRICS_HOST = os.environ.get("GURGAON_METRICS_HOST", "127.0.0.1")
+# File rewritten with the same metrics every METRICS_INTERVAL seconds (unset = off)
+METRICS_FILE = os.environ.get("GURGAON_METRICS_FILE") or None
+METRICS_INTERVAL = float(os.environ.get("GURGAON_METRICS_INTERVAL", "15"))
+# Sampling profiler interval in ms; 0 keeps it off
+PROFILE_INTERVAL_MS = float(os.environ.get("GURGAON_PROFILE_INTERVAL_MS", "0"))
@@ -0,0 +1,115 @@
+"""Correlation matrices from stored sufficient statistics.
+
+``CorrelationStats`` keeps, for every pair of numeric columns, the count of rows
+where both are present and the sums, sums of squares and cross-products over
+those rows. That is enough to reproduce ``DataFrame.corr()`` (pairwise-complete
+Pearson) exactly, and the statistics of two row sets simply add up. New
+listings can therefore be folded in with ``update`` and property types merged
+with ``+``, without rescanning any rows; ``remove`` takes rows back out.
+"""
+import numpy as np
+import pandas as pd
+
+OVERALL = "Overall"
+
+
+class CorrelationStats:
+    """Pairwise sufficient statistics for a fixed list of numeric columns.
+
+    Values are shifted by a constant ``shift`` vector before accumulating, which
+    keeps the sums well-conditioned for columns like latitude whose spread is
+    tiny compared to their mean. Stats can only be merged if they share a shift.
+    """
+
+    def __init__(self, columns, shift):
+        k = len(columns)
+        self.columns = list(columns)
+        self.shift = np.asarray(shift, dtype=np.float64)
+        self.n = np.zeros((k, k))
+        # sx[i, j] = sum of x_i over rows where both i and j are present
+        self.sx = np.zeros((k, k))
+        self.sxx = np.zeros((k, k))
+        self.sxy = np.zeros((k, k))
+        self.rows = 0
+
+    @classmethod
+    def from_frame(cls, df, columns=None, shift=None):
+        columns = list(df.select_dtypes(include='number').columns) if columns is None else list(columns)
+        if shift is None:
+            shift = df[columns].mean().fillna(0.0).to_numpy()
+        return cls(columns, shift).update(df)
+
+    def update(self, df):
+        """Fold the rows of ``df`` into the statistics (in place) and return self."""
+        return self._accumulate(df, 1.0)
+
+    def remove(self, df):
+        """Take rows previously passed to ``update`` back out (in place) and return self."""
+        return self._accumulate(df, -1.0)
+
+    def _accumulate(self, df, sign):
+        values = df[self.columns].to_numpy(dtype=np.float64) - self.shift
+        present = ~np.isnan(values)
+        mask = present.astype(np.float64)
+        x = np.where(present, values, 0.0)
+        self.n += sign * (mask.T @ mask)
+        self.sx += sign * (x.T @ mask)
+        self.sxx += sign * ((x * x).T @ mask)
+        self.sxy += sign * (x.T @ x)
+        self.rows += int(sign) * len(df)
+        return self
+
+    def __add__(self, other):
+        if self.columns != other.columns or not np.array_equal(self.shift, other.shift):
+            raise ValueError("Can only merge CorrelationStats with the same columns and shift")
+        merged = CorrelationStats(self.columns, self.shift)
+        for name in ('n', 'sx', 'sxx', 'sxy'):
+            setattr(merged, name, getattr(self, name) + getattr(other, name))
+        merged.rows = self.rows + other.rows
+        return merged
+
+    def corr(self):
+        """Pearson correlation matrix, matching ``DataFrame.corr()``."""
+        n = self.n
+        cov = n * self.sxy - self.sx * self.sx.T
+        var_i = n * self.sxx - self.sx ** 2
+        var_j = var_i.T
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result = cov / np.sqrt(var_i * var_j)
+        result[(n < 2) | (var_i <= 0) | (var_j <= 0)] = np.nan
+        result = np.clip(result, -1.0, 1.0)
+        np.fill_diagonal(result, np.where(np.diag(n) >= 2, 1.0, np.nan))
+        return pd.DataFrame(result, index=self.columns, columns=self.columns)
+
+    # -----------------------------------
+    def save(self, path):
+        np.savez(path, columns=np.array(self.columns), shift=self.shift,
+                 n=self.n, sx=self.sx, sxx=self.sxx, sxy=self.sxy, rows=self.rows)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path, allow_pickle=False)
+        stats = cls(data['columns'].tolist(), data['shift'])
+        for name in ('n', 'sx', 'sxx', 'sxy'):
+            setattr(stats, name, data[name])
+        stats.rows = int(data['rows'])
+        return stats
+
+
+def build_correlation_stats(df, by='property_type'):
+    """Stats per value of ``by`` plus an ``"Overall"`` entry merged from them."""
+    columns = list(df.select_dtypes(include='number').columns)
+    shift = df[columns].mean().fillna(0.0).to_numpy()
+    stats = {
+        key: CorrelationStats(columns, shift).update(group)
+        for key, group in df.groupby(by)
+    }
+    overall = CorrelationStats(columns, shift)
+    for group_stats in stats.values():
+        overall = overall + group_stats
+    # Rows with no group value still belong to the overall matrix
+    missing = df[df[by].isna()]
+    if len(missing):
+        overall.update(missing)
+    stats[OVERALL] = overall
+    return stats
@@ -0,0 +1,143 @@
+"""Cached, typed data access for the analytics dashboard.
+
+The raw CSVs are parsed and cleaned once, then written as Parquet under
+``datasets/.cache``. Later loads read the Parquet copy directly, and a copy is
+rebuilt automatically whenever its source CSV changes (size or mtime).
+
+The returned frames are shared between sessions: treat them as read-only and
+``.copy()`` before adding columns.
+"""
+import ast
+import json
+import re
+
+import pandas as pd
+
+from utils.config import DATASETS_DIR, VIZ_DATA_PATH, WORDCLOUD_DATA_PATH
+from utils.metrics import count_cache, span
+
+CACHE_DIR = DATASETS_DIR / ".cache"
+
+# Room counts are scraped as text ("3+"); the dashboard treats them as numbers
+ROOM_COLUMNS = ['balcony', 'bathroom', 'bedRoom', 'floorNum']
+SECTOR_MEAN_COLUMNS = ['price', 'price_per_sqft', 'built_up_area', 'latitude', 'longitude']
+# "28.4160° N, 76.9914° E" as scraped
+COORDINATES_PATTERN = re.compile(r"([\d.]+)\s*°?\s*([NS])\W+([\d.]+)\s*°?\s*([EW])")
+
+
+# ---------------------------------------
+# CLEANING
+# ---------------------------------------
+def parse_coordinates(value):
+    """Parse "28.4160° N, 76.9914° E" into (latitude, longitude); (nan, nan) if unreadable."""
+    match = COORDINATES_PATTERN.search(value) if isinstance(value, str) else None
+    if match is None:
+        return float('nan'), float('nan')
+    lat, ns, lon, ew = match.groups()
+    return float(lat) * (-1 if ns == 'S' else 1), float(lon) * (-1 if ew == 'W' else 1)
+
+
+def clean_viz_data(df):
+    """Apply the dashboard's cleaning to raw ``data_viz1.csv`` rows."""
+    df = df.copy()
+    for col in ROOM_COLUMNS:
+        df[col] = (
+            df[col]
+            .astype(str)
+            .str.replace('+', '', regex=False)
+            .astype(float)
+        )
+    for col in ['latitude', 'longitude', 'price', 'price_per_sqft', 'built_up_area']:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    # Fill missing latitude/longitude from the scraped coordinates text
+    if 'coordinates' in df.columns:
+        missing = df['latitude'].isna() | df['longitude'].isna()
+        if missing.any():
+            parsed = df.loc[missing, 'coordinates'].map(parse_coordinates)
+            df.loc[missing, 'latitude'] = parsed.str[0]
+            df.loc[missing, 'longitude'] = parsed.str[1]
+    return df
+
+
+def parse_features(value):
+    """Turn a stored feature list ("['Lift(s)', 'Park']") into a flat list of names."""
+    if isinstance(value, str):
+        value = ast.literal_eval(value)
+    if not isinstance(value, list):
+        return []
+    flat = []
+    for item in value:
+        if isinstance(item, list):
+            flat.extend(str(x) for x in item)
+        else:
+            flat.append(str(item))
+    return [f.strip() for f in flat if f and f.strip()]
+
+
+def clean_wordcloud_data(df):
+    """Normalize sectors/property types and parse every feature list once."""
+    df = df.copy()
+    df['sector'] = df['sector'].str.lower().str.strip()
+    if 'property_type' in df.columns:
+        df['property_type'] = df['property_type'].str.lower().str.strip()
+    df['features'] = df['features'].apply(parse_features)
+    return df
+
+
+# ---------------------------------------
+# PARQUET CACHE
+# ---------------------------------------
+def source_signature(path):
+    """Cheap change detector for a source file: (size, mtime in ns)."""
+    stat = path.stat()
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _load_cached(source, cleaner):
+    cache_path = CACHE_DIR / f"{source.stem}.parquet"
+    meta_path = CACHE_DIR / f"{source.stem}.json"
+    signature = list(source_signature(source))
+
+    if cache_path.exists() and meta_path.exists():
+        if json.loads(meta_path.read_text()).get("source_signature") == signature:
+            count_cache(f"parquet.{source.stem}", hit=True)
+            with span(f"load.{source.stem}.parquet"):
+                return pd.read_parquet(cache_path)
+
+    count_cache(f"parquet.{source.stem}", hit=False)
+    with span(f"load.{source.stem}.csv"):
+        raw = pd.read_csv(source)
+    # For the WordCloud data this is where literal_eval runs
+    with span(f"clean.{source.stem}"):
+        df = cleaner(raw)
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_suffix(".tmp")
+        df.to_parquet(tmp_path, index=False)
+        tmp_path.replace(cache_path)
+        meta_path.write_text(json.dumps({"source": source.name, "source_signature": signature}))
+    except OSError:
+        # Read-only deployments still work, they just re-parse the CSV
+        pass
+    return df
+
+
+def load_viz_data():
+    """Cleaned ``data_viz1.csv`` with numeric room counts."""
+    return _load_cached(VIZ_DATA_PATH, clean_viz_data)
+
+
+def load_wordcloud_data():
+    """Cleaned ``word_cloud_data.csv`` with ``features`` as a list per row."""
+    df = _load_cached(WORDCLOUD_DATA_PATH, clean_wordcloud_data)
+    # Parquet hands list columns back as arrays
+    df['features'] = df['features'].map(list)
+    return df
+
+
+# ---------------------------------------
+# AGGREGATES
+# ---------------------------------------
+def sector_means(df):
+    """Per-sector means of price, price/sqft, area and coordinates."""
+    return df.groupby('sector')[SECTOR_MEAN_COLUMNS].mean().reset_index()
@@ -0,0 +1,130 @@
+"""Spatial index over listing coordinates for the Geo Price Map.
+
+* Radius queries ("listings within 2 km of here") use a ``scipy`` KD-tree over
+  unit-sphere coordinates, so distances are great-circle distances. scipy is
+  already installed as a scikit-learn dependency.
+* Bounding-box queries binary-search a latitude-sorted copy of the points.
+* Grid cells are pre-aggregated for every map zoom level at build time. A cell
+  covers ``CELL_PIXELS`` screen pixels in the map's Web-Mercator tiling, so the
+  number of markers stays about the same at any zoom, and the tab never sends
+  more than a few thousand of them to the browser.
+"""
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+# Zoom levels with pre-aggregated cells (10 shows all of Gurgaon, 16 a few streets)
+GRID_ZOOMS = range(9, 17)
+# Cell edge in screen pixels; Web-Mercator tiles are 256 px
+CELL_PIXELS = 32
+TILE_PIXELS = 256
+# Columns averaged per cell and per radius query
+GEO_VALUE_COLUMNS = ['price', 'price_per_sqft', 'built_up_area']
+
+
+# ---------------------------------------
+# PROJECTIONS
+# ---------------------------------------
+def unit_vectors(latitude, longitude):
+    """Points on the unit sphere; chord length between them is monotonic in distance."""
+    lat, lon = np.radians(latitude), np.radians(longitude)
+    return np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+
+def chord_length(distance_km):
+    return 2 * np.sin(np.asarray(distance_km) / (2 * EARTH_RADIUS_KM))
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def mercator(latitude, longitude):
+    """Web-Mercator (x, y) in [0, 1], the tiling the map renders in."""
+    x = (np.asarray(longitude) + 180.0) / 360.0
+    sin_lat = np.sin(np.radians(latitude))
+    y = 0.5 - np.log((1 + sin_lat) / (1 - sin_lat)) / (4 * np.pi)
+    return x, y
+
+
+def cells_per_axis(zoom):
+    return (2 ** zoom) * TILE_PIXELS // CELL_PIXELS
+
+
+# ---------------------------------------
+# GRID AGGREGATES
+# ---------------------------------------
+def grid_cells(df, zoom):
+    """Count, mean values and centroid of the listings in each cell at ``zoom``."""
+    x, y = mercator(df['latitude'].to_numpy(), df['longitude'].to_numpy())
+    n = cells_per_axis(zoom)
+    cell = (np.floor(y * n).astype(np.int64) * n) + np.floor(x * n).astype(np.int64)
+    grouped = df.assign(cell=cell).groupby('cell')
+    cells = grouped[['latitude', 'longitude'] + GEO_VALUE_COLUMNS].mean()
+    cells['listings'] = grouped.size()
+    return cells.reset_index()
+
+
+def build_grids(df, zooms=GRID_ZOOMS):
+    return {zoom: grid_cells(df, zoom) for zoom in zooms}
+
+
+# ---------------------------------------
+# INDEX
+# ---------------------------------------
+class GeoIndex:
+    """Listing rows with coordinates, indexed for radius, box and zoomed-grid queries."""
+
+    def __init__(self, df, zooms=GRID_ZOOMS):
+        from scipy.spatial import cKDTree
+
+        columns = ['sector', 'society', 'property_type', 'latitude', 'longitude'] + GEO_VALUE_COLUMNS
+        points = df[[col for col in columns if col in df.columns]].dropna(subset=['latitude', 'longitude'])
+        # Latitude order makes bounding boxes two binary searches plus a longitude mask
+        self.points = points.sort_values('latitude', kind='stable').reset_index(drop=True)
+        self._latitude = self.points['latitude'].to_numpy()
+        self._longitude = self.points['longitude'].to_numpy()
+        self._tree = cKDTree(unit_vectors(self._latitude, self._longitude))
+        self.grids = build_grids(self.points, zooms)
+
+    def __len__(self):
+        return len(self.points)
+
+    def within_radius(self, latitude, longitude, radius_km):
+        """Listings within ``radius_km`` of a point, nearest first, with ``distance_km``."""
+        centre = unit_vectors(np.atleast_1d(latitude), np.atleast_1d(longitude))[0]
+        hits = self._tree.query_ball_point(centre, chord_length(radius_km))
+        found = self.points.iloc[hits].copy()
+        found['distance_km'] = haversine_km(latitude, longitude, found['latitude'], found['longitude'])
+        return found.sort_values('distance_km').reset_index(drop=True)
+
+    def within_bbox(self, south, west, north, east):
+        """Listings inside a latitude/longitude box."""
+        start = np.searchsorted(self._latitude, south, side='left')
+        stop = np.searchsorted(self._latitude, north, side='right')
+        inside = (self._longitude[start:stop] >= west) & (self._longitude[start:stop] <= east)
+        return self.points.iloc[start:stop][inside].reset_index(drop=True)
+
+    def cells(self, zoom, bbox=None):
+        """Pre-aggregated cells at the nearest built zoom, optionally clipped to a box."""
+        zoom = min(self.grids, key=lambda built: abs(built - zoom))
+        cells = self.grids[zoom]
+        if bbox is not None:
+            south, west, north, east = bbox
+            cells = cells[cells['latitude'].between(south, north) & cells['longitude'].between(west, east)]
+        return cells
+
+
+def bbox_around(latitude, longitude, radius_km):
+    """(south, west, north, east) box that contains a circle of ``radius_km``."""
+    dlat = np.degrees(radius_km / EARTH_RADIUS_KM)
+    dlon = dlat / max(np.cos(np.radians(latitude)), 1e-6)
+    return latitude - dlat, longitude - dlon, latitude + dlat, longitude + dlon
+
+
+def zoom_for_radius(radius_km, latitude, height_pixels=900):
+    """Map zoom that fits a circle of ``radius_km`` into ``height_pixels``."""
+    metres_per_pixel = 2 * radius_km * 1000 / height_pixels
+    # 156543 m/px at zoom 0 on the equator, shrinking with cos(latitude)
+    return float(np.clip(np.log2(156543.03 * np.cos(np.radians(latitude)) / metres_per_pixel), 1, 18))
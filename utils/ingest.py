@@ -0,0 +1,366 @@
+"""Incremental ingestion of newly scraped listings.
+
+    python -m utils.ingest new_listings.csv more_listings.jsonl
+    python -m utils.ingest --status
+
+Files are read in chunks, cleaned exactly like the dashboard's CSVs, and
+appended to ``datasets/listings/<sector>/*.parquet``. The aggregates the
+dashboard shows (sector means, BHK counts, amenity counts, correlation sums)
+live in ``datasets/listings/_aggregates.pkl`` and are updated from each chunk,
+so a daily refresh only touches the new files. On the first run the store is
+seeded with ``data_viz1.csv`` and ``word_cloud_data.csv``.
+
+A file with listing columns (``price`` etc.) feeds the listing store and every
+aggregate; a file with a ``features`` column also feeds the amenity counts.
+Files already ingested (same name, size and mtime) are skipped. A listing file
+that changed since it was ingested replaces its earlier rows: they are read
+back from the store, subtracted from the aggregates and deleted.
+"""
+import argparse
+import hashlib
+import pickle
+import re
+
+import numpy as np
+import pandas as pd
+
+from utils.amenity_index import build_amenity_index, merge_amenity_index
+from utils.config import DATASETS_DIR, VIZ_DATA_PATH, WORDCLOUD_DATA_PATH
+from utils.correlation import OVERALL as CORRELATION_OVERALL
+from utils.correlation import CorrelationStats
+from utils.data_layer import SECTOR_MEAN_COLUMNS, clean_viz_data, parse_features, source_signature
+from utils.metrics import span
+from utils.summaries import add_counts, bhk_counts, subtract_counts
+
+LISTINGS_DIR = DATASETS_DIR / "listings"
+# Leading underscore: pyarrow skips it when reading the listing files
+AGGREGATES_PATH = LISTINGS_DIR / "_aggregates.pkl"
+DEFAULT_CHUNK_SIZE = 50_000
+
+# Column layout of data_viz1.csv, kept for every ingested listing
+TEXT_COLUMNS = ['property_type', 'society', 'sector', 'agePossession', 'coordinates']
+LISTING_COLUMNS = [
+    'property_type', 'society', 'sector', 'price', 'price_per_sqft', 'bedRoom', 'bathroom',
+    'balcony', 'floorNum', 'agePossession', 'built_up_area', 'study room', 'servant room',
+    'store room', 'pooja room', 'others', 'furnishing_type', 'luxury_score', 'coordinates',
+    'latitude', 'longitude',
+]
+LISTING_NUMERIC_COLUMNS = [col for col in LISTING_COLUMNS if col not in TEXT_COLUMNS]
+
+
+def _schema():
+    import pyarrow as pa
+
+    fields = [pa.field(col, pa.string() if col in TEXT_COLUMNS else pa.float64()) for col in LISTING_COLUMNS]
+    return pa.schema(fields + [pa.field('features', pa.list_(pa.string()))])
+
+
+# ---------------------------------------
+# READING / CLEANING
+# ---------------------------------------
+def iter_source_chunks(path, chunksize=DEFAULT_CHUNK_SIZE):
+    """Yield raw DataFrame chunks from a CSV or JSON-lines file."""
+    if path.suffix.lower() in (".jsonl", ".ndjson", ".json"):
+        # dtype=False keeps "3+" and friends as text, like read_csv does
+        yield from pd.read_json(path, lines=True, chunksize=chunksize, dtype=False)
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize)
+
+
+def _text(series, lower=False):
+    present = series.notna()
+    cleaned = series.astype(object).where(~present, series.astype(str).str.strip())
+    if lower:
+        cleaned = cleaned.where(~present, cleaned.str.lower())
+    return cleaned
+
+
+def clean_listings(chunk):
+    """Normalize a raw chunk to ``LISTING_COLUMNS`` plus a ``features`` list column."""
+    df = chunk.reindex(columns=LISTING_COLUMNS + ['features'])
+    for col in TEXT_COLUMNS:
+        df[col] = _text(df[col], lower=col in ('sector', 'property_type'))
+    # Same room / price / coordinate cleaning as the dashboard's data_viz1.csv
+    df = clean_viz_data(df)
+    for col in LISTING_NUMERIC_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors='coerce').astype(np.float64)
+    df['features'] = df['features'].map(parse_features)
+    return df.dropna(subset=['sector']).reset_index(drop=True)
+
+
+def has_listing_columns(columns):
+    return 'price' in columns
+
+
+# ---------------------------------------
+# AGGREGATES
+# ---------------------------------------
+class ListingAggregates:
+    """Additive summaries of every ingested row, plus the list of ingested files."""
+
+    def __init__(self):
+        self.sector_sums = None     # per-sector sums of SECTOR_MEAN_COLUMNS
+        self.sector_counts = None   # per-sector non-null counts of the same
+        self.bhk_counts = None
+        self.amenity_index = {}
+        self.correlation = None     # {property_type / "Overall": CorrelationStats}
+        self.files = {}             # file name -> {"signature", "batch_id", "rows"}
+        self.rows = 0
+
+    def update_listings(self, df):
+        grouped = df.groupby('sector')[SECTOR_MEAN_COLUMNS]
+        sums, counts = grouped.sum(), grouped.count()
+        if self.sector_sums is None:
+            self.sector_sums, self.sector_counts = sums, counts
+        else:
+            self.sector_sums = self.sector_sums.add(sums, fill_value=0)
+            self.sector_counts = self.sector_counts.add(counts, fill_value=0)
+
+        self.bhk_counts = add_counts(self.bhk_counts, bhk_counts(df))
+
+        numeric = df[LISTING_NUMERIC_COLUMNS]
+        if self.correlation is None:
+            # The first chunk fixes the shift every later chunk is accumulated with
+            shift = numeric.mean().fillna(0.0).to_numpy()
+            self.correlation = {CORRELATION_OVERALL: CorrelationStats(LISTING_NUMERIC_COLUMNS, shift)}
+        overall = self.correlation[CORRELATION_OVERALL]
+        for property_type, group in numeric.groupby(df['property_type']):
+            stats = self.correlation.get(property_type)
+            if stats is None:
+                stats = self.correlation[property_type] = CorrelationStats(LISTING_NUMERIC_COLUMNS, overall.shift)
+            stats.update(group)
+        overall.update(numeric)
+        self.rows += len(df)
+
+    def update_amenities(self, df):
+        self.amenity_index = merge_amenity_index(self.amenity_index, build_amenity_index(df))
+
+    def remove_listings(self, df):
+        """Undo ``update_listings`` for rows it was given earlier."""
+        grouped = df.groupby('sector')[SECTOR_MEAN_COLUMNS]
+        self.sector_sums = self.sector_sums.sub(grouped.sum(), fill_value=0)
+        self.sector_counts = self.sector_counts.sub(grouped.count(), fill_value=0)
+        # Sectors left without any row disappear, as if never ingested
+        kept = self.sector_counts.sum(axis=1) > 0
+        self.sector_sums, self.sector_counts = self.sector_sums[kept], self.sector_counts[kept]
+
+        self.bhk_counts = subtract_counts(self.bhk_counts, bhk_counts(df))
+
+        numeric = df[LISTING_NUMERIC_COLUMNS]
+        for property_type, group in numeric.groupby(df['property_type']):
+            self.correlation[property_type].remove(group)
+        self.correlation[CORRELATION_OVERALL].remove(numeric)
+        self.rows -= len(df)
+
+    def remove_amenities(self, df):
+        self.amenity_index = merge_amenity_index(self.amenity_index, build_amenity_index(df), sign=-1)
+
+    def sector_means(self):
+        """Same frame as ``data_layer.sector_means`` over every ingested row."""
+        means = self.sector_sums / self.sector_counts.replace(0, np.nan)
+        return means.reset_index()
+
+    def save(self, path=None):
+        path = AGGREGATES_PATH if path is None else path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump(self, f)
+        tmp_path.replace(path)
+
+
+def load_aggregates(path=AGGREGATES_PATH):
+    """The stored aggregates, or None when nothing has been ingested yet."""
+    if not path.exists():
+        return None
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def store_signature():
+    """Changes whenever an ingestion run commits; None without a store."""
+    return source_signature(AGGREGATES_PATH) if AGGREGATES_PATH.exists() else None
+
+
+# ---------------------------------------
+# LISTING STORE
+# ---------------------------------------
+def partition_dir(sector):
+    return LISTINGS_DIR / (re.sub(r"[^a-z0-9]+", "_", sector.lower()).strip("_") or "unknown")
+
+
+def _batch_id(path):
+    size, mtime_ns = source_signature(path)
+    return hashlib.sha1(f"{path.name}:{size}:{mtime_ns}".encode()).hexdigest()[:12]
+
+
+def _batch_parts(batch_id):
+    """Every part of a batch, whether published or still under its staged "_" name."""
+    return [part for pattern in (f"_{batch_id}-*.parquet", f"{batch_id}-*.parquet")
+            for part in sorted(LISTINGS_DIR.glob(f"*/{pattern}"))]
+
+
+def _remove_batch(batch_id):
+    # Leftovers of an interrupted run: staged or published but never committed
+    for part in _batch_parts(batch_id):
+        part.unlink()
+
+
+def _read_parts(parts):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _schema()
+    df = pa.concat_tables([pq.read_table(part, schema=schema) for part in parts]).to_pandas()
+    # Parquet hands list columns back as arrays
+    df['features'] = df['features'].map(lambda v: [] if v is None else list(v))
+    return df
+
+
+def _retract_batch(name, known, aggregates):
+    """Subtract an earlier ingestion of ``name`` from ``aggregates``; returns its parts.
+
+    The parts are hidden (renamed to "_") rather than deleted, so a run
+    interrupted before the aggregates are saved can still find and retract them.
+    """
+    parts = _batch_parts(known["batch_id"])
+    listings = known.get("listings", bool(parts))
+    if not listings:
+        # Amenity-only rows aren't kept in the store, so there is nothing to subtract
+        raise ValueError(
+            f"{name} changed since it was ingested, but its amenity counts can't be taken back out. "
+            f"Ingest the new version under another file name, or delete {LISTINGS_DIR} to rebuild the store."
+        )
+    if not parts:
+        return []
+    df = _read_parts(parts)
+    aggregates.remove_listings(df)
+    if known.get("amenities", bool(df['features'].map(len).any())):
+        aggregates.remove_amenities(df)
+    hidden = []
+    for part in parts:
+        if not part.name.startswith("_"):
+            part = part.replace(part.with_name(f"_{part.name}"))
+        hidden.append(part)
+    return hidden
+
+
+def _write_parts(df, batch_id, chunk_no, schema):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    staged = []
+    for sector, group in df.groupby('sector'):
+        directory = partition_dir(sector)
+        directory.mkdir(parents=True, exist_ok=True)
+        # Staged under a "_" name, which readers ignore until the file commits
+        path = directory / f"_{batch_id}-{chunk_no:05d}.parquet"
+        pq.write_table(pa.Table.from_pandas(group, schema=schema, preserve_index=False), path)
+        staged.append(path)
+    return staged
+
+
+def load_listings(columns=LISTING_COLUMNS, sectors=None):
+    """Read committed listings, optionally only some columns and sectors."""
+    import pyarrow.dataset as ds
+
+    if sectors is None:
+        sources = [LISTINGS_DIR]
+    else:
+        sources = [partition_dir(s) for s in sectors if partition_dir(s).exists()]
+        if not sources:
+            return pd.DataFrame(columns=columns)
+    sources = [str(p) for p in sources]
+    dataset = ds.dataset(sources if len(sources) > 1 else sources[0], format="parquet", schema=_schema())
+    return dataset.to_table(columns=list(columns)).to_pandas()
+
+
+# ---------------------------------------
+# INGESTION
+# ---------------------------------------
+def ingest_file(path, aggregates, chunksize=DEFAULT_CHUNK_SIZE):
+    """Stream one file into the store and ``aggregates``. Returns rows read, or None if skipped.
+
+    Listing files are staged chunk by chunk and published before the aggregates
+    are saved; a run interrupted before that is cleaned up and redone next time.
+    A file that changed since its last ingestion replaces that ingestion.
+    """
+    signature = list(source_signature(path))
+    known = aggregates.files.get(path.name)
+    if known is not None and known["signature"] == signature:
+        return None
+
+    batch_id = _batch_id(path)
+    _remove_batch(batch_id)
+    schema = _schema()
+    staged, rows, listings, amenities = [], 0, False, False
+    with span("ingest.file"):
+        replaced = _retract_batch(path.name, known, aggregates) if known is not None else []
+        for chunk_no, chunk in enumerate(iter_source_chunks(path, chunksize)):
+            with span("ingest.clean"):
+                df = clean_listings(chunk)
+            rows += len(chunk)
+            if has_listing_columns(chunk.columns):
+                listings = True
+                staged += _write_parts(df, batch_id, chunk_no, schema)
+                aggregates.update_listings(df)
+            if 'features' in chunk.columns:
+                amenities = True
+                aggregates.update_amenities(df)
+
+        for part in staged:
+            part.replace(part.with_name(part.name[1:]))
+        aggregates.files[path.name] = {"signature": signature, "batch_id": batch_id, "rows": rows,
+                                       "listings": listings, "amenities": amenities}
+        aggregates.save()
+        for part in replaced:
+            part.unlink()
+    return rows
+
+
+def ingest(paths, chunksize=DEFAULT_CHUNK_SIZE):
+    """Ingest several files in order, seeding the store from the snapshots first."""
+    aggregates = load_aggregates()
+    if aggregates is None:
+        aggregates = ListingAggregates()
+        snapshots = [VIZ_DATA_PATH, WORDCLOUD_DATA_PATH]
+        paths = snapshots + [p for p in paths if p.resolve() not in snapshots]
+    report = {}
+    for path in paths:
+        report[path.name] = ingest_file(path, aggregates, chunksize)
+    return aggregates, report
+
+
+def main():
+    from pathlib import Path
+
+    # Under ``python -m`` this module is ``__main__``; aggregates pickled from its
+    # classes could only be unpickled by this script, so go through the package
+    from utils.ingest import ingest, load_aggregates
+
+    parser = argparse.ArgumentParser(description="Append new listing files to the partitioned store.")
+    parser.add_argument("files", nargs="*", type=Path, help="CSV or JSON-lines files")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--status", action="store_true", help="List ingested files and exit")
+    args = parser.parse_args()
+
+    if args.status:
+        aggregates = load_aggregates()
+        if aggregates is None:
+            print("Nothing ingested yet")
+            return
+        for name, info in aggregates.files.items():
+            print(f"{name}: {info['rows']} rows (batch {info['batch_id']})")
+        print(f"{aggregates.rows} listings in {LISTINGS_DIR}")
+        return
+
+    try:
+        _, report = ingest(args.files, args.chunksize)
+    except ValueError as err:
+        parser.error(str(err))
+    for name, rows in report.items():
+        print(f"{name}: {'already ingested' if rows is None else f'{rows} rows'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Model manifest: everything the app needs to know about the inputs, without df.pkl.
+
+The manifest is a small JSON file written next to the model artifacts with the
+column order, the categorical domains used by the selectboxes, the numeric
+ranges seen in training, each sector's centroid (for the sweep map) and the
+model version.
+
+    python -m utils.manifest          # (re)build models/manifest.json from df.pkl
+"""
+import json
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from utils.config import DF_PATH, FEATURE_COLUMNS, MODEL_STORE_DIR, MODELS_DIR, NUMERIC_COLUMNS, VIZ_DATA_PATH
+
+MANIFEST_PATH = MODELS_DIR / "manifest.json"
+
+# Columns shown as selectboxes on the predictor page
+CATEGORICAL_COLUMNS = [
+    'property_type', 'sector', 'bedRoom', 'bathroom', 'balcony', 'agePossession',
+    'furnishing_type', 'luxury_category', 'floor_category'
+]
+
+
+# ---------------------------------------
+# BUILD
+# ---------------------------------------
+def _plain(value):
+    # numpy scalars -> built-in types so json can write them
+    return value.item() if hasattr(value, "item") else value
+
+
+def sector_centroids(path=VIZ_DATA_PATH):
+    """``{sector: [latitude, longitude]}`` averaged over the listings in ``path``."""
+    try:
+        coords = pd.read_csv(path, usecols=['sector', 'latitude', 'longitude'])
+    except FileNotFoundError:
+        return {}
+    means = coords.dropna().groupby('sector')[['latitude', 'longitude']].mean().round(6)
+    return {sector: [lat, lon] for sector, (lat, lon) in means.iterrows()}
+
+
+def build_manifest(df):
+    """Build the manifest dict from the training feature frame."""
+    from utils.models import artifact_version
+
+    try:
+        version = artifact_version()
+    except FileNotFoundError:
+        version = None
+
+    return {
+        "model_version": version,
+        "built_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "columns": FEATURE_COLUMNS,
+        "categorical": {
+            col: [_plain(v) for v in sorted(df[col].dropna().unique().tolist())]
+            for col in CATEGORICAL_COLUMNS
+        },
+        "numeric": {
+            col: {"min": _plain(df[col].min()), "max": _plain(df[col].max())}
+            for col in NUMERIC_COLUMNS
+        },
+        "sector_centroids": sector_centroids(),
+    }
+
+
+def write_manifest(df=None, path=MANIFEST_PATH):
+    df = pd.read_pickle(DF_PATH) if df is None else df
+    manifest = build_manifest(df)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(manifest, indent=2))
+    tmp_path.replace(path)
+    return manifest
+
+
+# ---------------------------------------
+# LOAD
+# ---------------------------------------
+def load_manifest(path=None, version=None):
+    """Read the manifest, building it from df.pkl the first time if it is missing.
+
+    With a shared model store configured, the copy published with ``version``
+    (default: the current one) is read instead.
+    """
+    if path is None:
+        if MODEL_STORE_DIR is not None:
+            from utils.model_store import attach
+
+            return attach().snapshot(version).manifest
+        path = MANIFEST_PATH
+    if path.exists():
+        return json.loads(path.read_text())
+    try:
+        return write_manifest(path=path)
+    except OSError:
+        # Read-only deployments: build in memory only
+        return build_manifest(pd.read_pickle(DF_PATH))
+
+
+# ---------------------------------------
+# VALIDATION
+# ---------------------------------------
+def validate_rows(frame, manifest):
+    """Check prepared input rows against the manifest.
+
+    Returns ``(errors, warnings)``: errors are values the models have never seen
+    (unknown categories), warnings are numeric values outside the training range.
+    """
+    errors, warnings = [], []
+    for col, domain in manifest["categorical"].items():
+        if col not in frame.columns:
+            continue
+        unknown = ~frame[col].isin(domain)
+        if unknown.any():
+            values = ", ".join(map(str, frame.loc[unknown, col].unique()[:5]))
+            errors.append(f"{int(unknown.sum())} row(s) have unknown {col}: {values}")
+    for col, bounds in manifest["numeric"].items():
+        if col not in frame.columns:
+            continue
+        outside = (frame[col] < bounds["min"]) | (frame[col] > bounds["max"])
+        if outside.any():
+            warnings.append(
+                f"{int(outside.sum())} row(s) have {col} outside the training range "
+                f"[{bounds['min']}, {bounds['max']}]"
+            )
+    return errors, warnings
+
+
+def main():
+    manifest = write_manifest()
+    print(f"Wrote {MANIFEST_PATH} (model version {manifest['model_version']})")
+    for col, domain in manifest["categorical"].items():
+        print(f"  {col}: {len(domain)} values")
+
+
+if __name__ == "__main__":
+    main()
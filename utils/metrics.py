@@ -0,0 +1,332 @@
+"""Timing spans, cache counters and process memory, exported for Prometheus.
+
+Hot paths are wrapped in named spans::
+
+    with span("load_models"):
+        ...
+
+    @timed("tab.geo")
+    def geo_map_tab(...):
+        ...
+
+Every span feeds a latency histogram. ``render_prometheus()`` returns all
+metrics in Prometheus' text format. They are published when configured with:
+
+* ``GURGAON_METRICS_PORT``: serve ``/metrics`` (and ``/profile``) on that port,
+  bound to ``GURGAON_METRICS_HOST`` (default ``127.0.0.1``)
+* ``GURGAON_METRICS_FILE``: rewrite that file every ``GURGAON_METRICS_INTERVAL`` seconds
+* ``GURGAON_PROFILE_INTERVAL_MS``: run the sampling profiler at that interval
+
+``serve.py`` also answers ``GET /metrics`` itself.
+"""
+import bisect
+import collections
+import functools
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils.config import METRICS_FILE, METRICS_HOST, METRICS_INTERVAL, METRICS_PORT, PROFILE_INTERVAL_MS
+
+PREFIX = "gurgaon"
+# Histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+# ---------------------------------------
+# REGISTRY
+# ---------------------------------------
+class Histogram:
+    """Cumulative-bucket latency histogram, in the shape Prometheus expects."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def cumulative(self):
+        total, rows = 0, []
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            rows.append((bound, total))
+        return rows
+
+
+class MetricsRegistry:
+    """Span histograms plus cache counters, shared by every thread in the process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._spans = {}
+        self._cache_counts = collections.defaultdict(lambda: {"hits": 0, "misses": 0})
+        self._cache_sources = {}
+
+    def observe(self, name, seconds):
+        with self._lock:
+            histogram = self._spans.get(name)
+            if histogram is None:
+                histogram = self._spans[name] = Histogram()
+            histogram.observe(seconds)
+
+    def count_cache(self, name, hit):
+        with self._lock:
+            self._cache_counts[name]["hits" if hit else "misses"] += 1
+
+    def register_cache(self, name, cache):
+        """Report an object with a ``stats()`` method (like ``PredictionCache``)."""
+        with self._lock:
+            self._cache_sources[name] = cache
+
+    def snapshot(self):
+        with self._lock:
+            spans = {
+                name: (h.cumulative(), h.sum, h.count) for name, h in sorted(self._spans.items())
+            }
+            caches = {name: dict(counts) for name, counts in self._cache_counts.items()}
+            sources = dict(self._cache_sources)
+        for name, cache in sources.items():
+            stats = cache.stats()
+            caches[name] = {"hits": stats["hits"], "misses": stats["misses"]}
+        return spans, dict(sorted(caches.items()))
+
+    def reset(self):
+        with self._lock:
+            self._spans.clear()
+            self._cache_counts.clear()
+
+
+REGISTRY = MetricsRegistry()
+
+
+@contextmanager
+def span(name, registry=REGISTRY):
+    """Time the enclosed block into the ``name`` histogram (also on errors)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        registry.observe(name, time.perf_counter() - start)
+
+
+def timed(name):
+    """Decorator form of ``span``."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def observe(name, seconds):
+    """Record a duration measured elsewhere."""
+    REGISTRY.observe(name, seconds)
+
+
+def count_cache(name, hit):
+    REGISTRY.count_cache(name, hit)
+
+
+def register_cache(name, cache):
+    REGISTRY.register_cache(name, cache)
+
+
+# ---------------------------------------
+# PROCESS MEMORY
+# ---------------------------------------
+def rss_bytes():
+    """Current resident set size, or None where it can't be read."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def peak_rss_bytes():
+    try:
+        import resource
+    except ImportError:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return usage if sys.platform == "darwin" else usage * 1024
+
+
+# ---------------------------------------
+# PROMETHEUS TEXT FORMAT
+# ---------------------------------------
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _bound(value):
+    return "+Inf" if value == float("inf") else repr(float(value))
+
+
+def render_prometheus(registry=REGISTRY):
+    spans, caches = registry.snapshot()
+    lines = [
+        f"# HELP {PREFIX}_span_duration_seconds Wall time of instrumented code paths.",
+        f"# TYPE {PREFIX}_span_duration_seconds histogram",
+    ]
+    for name, (buckets, total, count) in spans.items():
+        label = _label(name)
+        for bound, cumulative in buckets:
+            lines.append(f'{PREFIX}_span_duration_seconds_bucket{{span="{label}",le="{_bound(bound)}"}} {cumulative}')
+        lines.append(f'{PREFIX}_span_duration_seconds_sum{{span="{label}"}} {total!r}')
+        lines.append(f'{PREFIX}_span_duration_seconds_count{{span="{label}"}} {count}')
+
+    for kind in ("hits", "misses"):
+        lines.append(f"# HELP {PREFIX}_cache_{kind}_total Cache lookups that {'found' if kind == 'hits' else 'missed'} an entry.")
+        lines.append(f"# TYPE {PREFIX}_cache_{kind}_total counter")
+        for name, counts in caches.items():
+            lines.append(f'{PREFIX}_cache_{kind}_total{{cache="{_label(name)}"}} {counts[kind]}')
+    lines.append(f"# HELP {PREFIX}_cache_hit_ratio Share of lookups served from the cache.")
+    lines.append(f"# TYPE {PREFIX}_cache_hit_ratio gauge")
+    for name, counts in caches.items():
+        lookups = counts["hits"] + counts["misses"]
+        ratio = counts["hits"] / lookups if lookups else 0.0
+        lines.append(f'{PREFIX}_cache_hit_ratio{{cache="{_label(name)}"}} {ratio!r}')
+
+    for metric, value, help_text in (
+        ("process_resident_memory_bytes", rss_bytes(), "Current resident set size."),
+        ("process_peak_resident_memory_bytes", peak_rss_bytes(), "Peak resident set size."),
+    ):
+        if value is not None:
+            lines += [f"# HELP {PREFIX}_{metric} {help_text}", f"# TYPE {PREFIX}_{metric} gauge",
+                      f"{PREFIX}_{metric} {value}"]
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics_file(path):
+    """Write the current metrics atomically (for node_exporter's textfile collector)."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(render_prometheus())
+    os.replace(tmp_path, path)
+
+
+# ---------------------------------------
+# SAMPLING PROFILER
+# ---------------------------------------
+class SamplingProfiler:
+    """Low-overhead wall-clock profiler that samples every thread's stack.
+
+    A daemon thread wakes every ``interval`` seconds and counts each thread's
+    current call stack. ``collapsed()`` returns the counts in the "collapsed
+    stack" format read by flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, interval=0.01, max_depth=64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples = collections.Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                with self._lock:
+                    self.samples[";".join(reversed(stack))] += 1
+
+    def collapsed(self):
+        with self._lock:
+            return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common()) + "\n"
+
+
+# ---------------------------------------
+# EXPORTERS
+# ---------------------------------------
+_profiler = None
+_exporters_started = False
+_exporters_lock = threading.Lock()
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/metrics":
+            body, content_type = render_prometheus(), "text/plain; version=0.0.4"
+        elif self.path == "/profile" and _profiler is not None:
+            body, content_type = _profiler.collapsed(), "text/plain"
+        else:
+            self.send_error(404)
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _write_periodically(path, interval):
+    while True:
+        try:
+            write_metrics_file(path)
+        except OSError:
+            pass
+        time.sleep(interval)
+
+
+def start_exporters(port=METRICS_PORT, path=METRICS_FILE, profile_interval_ms=PROFILE_INTERVAL_MS,
+                    host=METRICS_HOST):
+    """Start whichever exporters are configured, once per process.
+
+    Safe to call on every Streamlit rerun; with nothing configured it does nothing.
+    """
+    global _exporters_started, _profiler
+    with _exporters_lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+        if profile_interval_ms:
+            _profiler = SamplingProfiler(profile_interval_ms / 1000).start()
+        if port:
+            server = ThreadingHTTPServer((host, port), MetricsHandler)
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        if path:
+            threading.Thread(target=_write_periodically, args=(path, METRICS_INTERVAL),
+                             name="metrics-file", daemon=True).start()
+
+
+def get_profiler():
+    """The running ``SamplingProfiler``, or None when profiling is off."""
+    return _profiler
@@ -0,0 +1,234 @@
+"""Shared model store for several app / ``serve.py`` workers on one node.
+
+    python -m utils.model_store publish                    # store = GURGAON_MODEL_STORE
+    python -m utils.model_store publish --variant compact
+    python -m utils.model_store status
+    python -m utils.model_store prune --keep 2
+
+One publisher loads the models once and writes each of them as an
+uncompressed ``joblib`` file under ``<store>/<version>/``, next to a copy of
+``manifest.json``. It then repoints the ``current`` symlink with
+``os.replace``, so readers see either the old version or the new one, never a
+half-written one.
+
+Workers started with ``GURGAON_MODEL_STORE`` memory-map those files read-only.
+On ``/dev/shm`` (or any local disk) the kernel keeps a single copy of the
+pages, however many workers attach. Each worker reads ``current`` before a
+prediction and, when it has moved, opens the new version's models and
+manifest, so a publish goes live without a restart. All models of one
+prediction come from the same version. Files of an old version stay valid for the workers still
+mapping them until ``prune`` removes the directory.
+
+Models are published with the compiled engine by default: its flat NumPy
+arrays are used straight from the mapping, whereas sklearn copies each tree's
+nodes into private memory when a pipeline is unpickled.
+"""
+import argparse
+import json
+import os
+import shutil
+import threading
+
+import joblib
+
+from utils.config import MODEL_FILES, MODEL_STORE_DIR
+from utils.metrics import span
+
+CURRENT_LINK = "current"
+MANIFEST_FILE = "manifest.json"
+DEFAULT_KEEP = 2
+DEFAULT_ENGINE = "compiled"
+
+
+def model_file(name):
+    return f"{name}.joblib"
+
+
+# ---------------------------------------
+# PUBLISHING
+# ---------------------------------------
+def current_version(store=MODEL_STORE_DIR):
+    """Name of the version ``current`` points to, or None before the first publish."""
+    try:
+        return os.readlink(store / CURRENT_LINK)
+    except FileNotFoundError:
+        return None
+
+
+def _point_current(store, version):
+    tmp_link = store / f".{CURRENT_LINK}-{os.getpid()}"
+    if tmp_link.is_symlink():
+        tmp_link.unlink()
+    # Relative target, so the store can be bind-mounted at another path
+    os.symlink(version, tmp_link)
+    os.replace(tmp_link, store / CURRENT_LINK)
+
+
+def publish(store=MODEL_STORE_DIR, engine=None, variant=None, names=None):
+    """Write the models to a new version directory and make it current."""
+    from utils.config import MODEL_VARIANT
+    from utils.manifest import MANIFEST_PATH, load_manifest
+    from utils.models import _loader, artifact_version
+
+    engine, variant = engine or DEFAULT_ENGINE, variant or MODEL_VARIANT
+    names = list(MODEL_FILES) if names is None else names
+    version = f"{artifact_version(names, engine, variant)}-{engine}-{variant}"
+    version_dir = store / version
+    if not version_dir.exists():
+        staging = store / f".{version}-{os.getpid()}"
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+        loader = _loader(engine, variant)
+        for name in names:
+            with span(f"publish.{name}"):
+                # Read fully, then dump uncompressed: every array becomes an mmap-able block
+                joblib.dump(loader(name, None), staging / model_file(name))
+        manifest = load_manifest(MANIFEST_PATH)
+        manifest["model_version"] = version
+        (staging / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2))
+        staging.rename(version_dir)
+    # Republishing an old version makes it the newest again for prune
+    os.utime(version_dir)
+    _point_current(store, version)
+    return version
+
+
+def versions(store=MODEL_STORE_DIR):
+    """Published version directories, oldest first."""
+    if not store.exists():
+        return []
+    dirs = [p for p in store.iterdir() if p.is_dir() and not p.is_symlink() and not p.name.startswith(".")]
+    return sorted(dirs, key=lambda p: p.stat().st_mtime_ns)
+
+
+def prune(store=MODEL_STORE_DIR, keep=DEFAULT_KEEP):
+    """Delete all but the ``keep`` newest versions; the current one is always kept."""
+    current = current_version(store)
+    old = [p for p in versions(store) if p.name != current]
+    # The current version counts towards ``keep``
+    old = old[:max(len(old) - (keep - 1), 0)]
+    for path in old:
+        # Workers still mapping these files keep them alive until they reopen
+        shutil.rmtree(path)
+    return [p.name for p in old]
+
+
+# ---------------------------------------
+# ATTACHING
+# ---------------------------------------
+class StoreModel:
+    """One model of one published version, mapped on its first ``predict``."""
+
+    def __init__(self, name, version_dir):
+        self.name = name
+        self.path = version_dir / model_file(name)
+        self._model = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    with span(f"load_model.{self.name}.store"):
+                        self._model = joblib.load(self.path, mmap_mode="r")
+        return self._model
+
+    def predict(self, df):
+        return self.get().predict(df)
+
+
+class StoreVersion:
+    """Every model and the manifest of a single published version.
+
+    Callers take one ``StoreVersion`` per prediction, so a publish in the middle
+    of it can't mix models (or cache keys) from two versions.
+    """
+
+    def __init__(self, store, version):
+        self.version = version
+        self.path = store / version
+        self.models = {name: StoreModel(name, self.path) for name in MODEL_FILES}
+        self._manifest = None
+
+    @property
+    def manifest(self):
+        if self._manifest is None:
+            self._manifest = json.loads((self.path / MANIFEST_FILE).read_text())
+        return self._manifest
+
+
+class SharedModelStore:
+    """Read-only view of a store that follows its ``current`` pointer."""
+
+    def __init__(self, store=MODEL_STORE_DIR):
+        self.store = store
+        self._latest = None
+        self._lock = threading.Lock()
+
+    @property
+    def version(self):
+        version = current_version(self.store)
+        if version is None:
+            raise FileNotFoundError(
+                f"No models published to {self.store}; run `python -m utils.model_store publish`"
+            )
+        return version
+
+    def snapshot(self, version=None):
+        """The ``StoreVersion`` for ``version`` (default: current), reused while it stays current."""
+        version = version or self.version
+        with self._lock:
+            latest = self._latest
+            if latest is not None and latest.version == version:
+                return latest
+            snapshot = StoreVersion(self.store, version)
+            if version == current_version(self.store):
+                # Hot swap: the previous version is dropped once its last user is done
+                self._latest = snapshot
+            return snapshot
+
+
+_ATTACHED = {}
+_ATTACH_LOCK = threading.Lock()
+
+
+def attach(store=MODEL_STORE_DIR):
+    """The process-wide ``SharedModelStore`` for ``store``."""
+    with _ATTACH_LOCK:
+        if store not in _ATTACHED:
+            _ATTACHED[store] = SharedModelStore(store)
+        return _ATTACHED[store]
+
+
+def main():
+    from pathlib import Path
+
+    parser = argparse.ArgumentParser(description="Publish models to the shared model store.")
+    parser.add_argument("command", choices=["publish", "status", "prune"])
+    parser.add_argument("--store", type=Path, default=MODEL_STORE_DIR,
+                        help="Store directory (default: GURGAON_MODEL_STORE)")
+    parser.add_argument("--engine", choices=["pipeline", "compiled"], default=DEFAULT_ENGINE)
+    parser.add_argument("--variant", choices=["full", "compact"], default=None)
+    parser.add_argument("--keep", type=int, default=DEFAULT_KEEP, help="Versions kept by prune")
+    args = parser.parse_args()
+
+    if args.store is None:
+        parser.error("set GURGAON_MODEL_STORE or pass --store")
+
+    if args.command == "publish":
+        version = publish(args.store, args.engine, args.variant)
+        print(f"Published {version} to {args.store}")
+    elif args.command == "prune":
+        for name in prune(args.store, max(args.keep, 1)):
+            print(f"Removed {name}")
+    else:
+        current = current_version(args.store)
+        for path in versions(args.store):
+            size = sum(f.stat().st_size for f in path.iterdir())
+            print(f"{'*' if path.name == current else ' '} {path.name}  {size / 1e6:.1f} MB")
+        if current is None:
+            print(f"Nothing published to {args.store}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+import argparse
+import functools
+import threading
+import warnings
+
+import joblib
+
+from utils.config import MODEL_ENGINE, MODEL_MMAP_MODE, MODEL_STORE_DIR, MODEL_VARIANT, MODELS_DIR, MODEL_FILES
+from utils.metrics import span
+
+
+# ---------------------------------------
+# PIPELINE LOADING
+# ---------------------------------------
+def load_pipeline(name, mmap_mode=MODEL_MMAP_MODE):
+    """Load one fitted pipeline by its short name ("rf", "xgb" or "ext").
+
+    Artifacts written with ``joblib.dump`` (uncompressed) have their arrays
+    memory-mapped; plain pickles are read normally.
+    """
+    # joblib.load also reads plain pickle files, so every artifact goes through it
+    with span(f"load_model.{name}"):
+        return joblib.load(MODELS_DIR / MODEL_FILES[name], mmap_mode=mmap_mode)
+
+
+def source_fingerprint(name):
+    """Size and mtime of a model's pipeline file, stamped into artifacts derived from it."""
+    stat = (MODELS_DIR / MODEL_FILES[name]).stat()
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def _load_derived(name, path, mmap_mode, kind):
+    """Load a compiled / compact artifact, or None if it was built from another pipeline."""
+    with span(f"load_model.{name}.{kind}"), warnings.catch_warnings():
+        # Compressed files can't be memory-mapped; joblib warns and reads them normally
+        warnings.simplefilter("ignore", UserWarning)
+        model = joblib.load(path, mmap_mode=mmap_mode)
+    if getattr(model, "source", None) != source_fingerprint(name):
+        warnings.warn(f"{path.name} was built from an older '{name}' pipeline; ignoring it")
+        return None
+    return model
+
+
+def load_compiled(name, mmap_mode=MODEL_MMAP_MODE):
+    """Load the compiled engine for one model, compiling it on the fly if needed.
+
+    A saved artifact is only used if it was compiled from the current pipeline
+    file. Falls back to the original pipeline (with a warning) when the pipeline
+    has a step the engine cannot compile.
+    """
+    from utils.tree_engine import UnsupportedPipelineError, compile_pipeline, compiled_path
+
+    path = compiled_path(name)
+    if path.exists():
+        # Compiled models are plain NumPy arrays, so mmap shares them across processes
+        model = _load_derived(name, path, mmap_mode, "compiled")
+        if model is not None:
+            return model
+    pipeline = load_pipeline(name, mmap_mode)
+    try:
+        return compile_pipeline(pipeline)
+    except UnsupportedPipelineError as err:
+        warnings.warn(f"Serving '{name}' uncompiled: {err}")
+        return pipeline
+
+
+def load_compact(name, mmap_mode=MODEL_MMAP_MODE, engine=None):
+    """Load the compact variant of one model, or the full model if none is current.
+
+    The fallback uses ``engine`` (default: GURGAON_MODEL_ENGINE), so a compiled
+    deployment stays compiled without its compact files.
+    """
+    from utils.compact import compact_path
+
+    path = compact_path(name)
+    model = _load_derived(name, path, mmap_mode, "compact") if path.exists() else None
+    if model is None:
+        warnings.warn(f"No current compact artifact for '{name}'; serving the full model")
+        return _loader(engine, "full")(name, mmap_mode)
+    return model
+
+
+def _loader(engine=None, variant=None):
+    if (variant or MODEL_VARIANT) == "compact":
+        return functools.partial(load_compact, engine=engine)
+    return load_compiled if (engine or MODEL_ENGINE) == "compiled" else load_pipeline
+
+
+class LazyModel:
+    """Stand-in for a model that is only loaded on its first ``predict``.
+
+    Lets pages render before any artifact is unpickled; the load happens once
+    per process, behind a lock, the first time a prediction is actually needed.
+    """
+
+    def __init__(self, name, engine=None, variant=None):
+        self.name = name
+        self.engine = engine or MODEL_ENGINE
+        self.variant = variant or MODEL_VARIANT
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._model is not None
+
+    def get(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = _loader(self.engine, self.variant)(self.name)
+        return self._model
+
+    def predict(self, df):
+        return self.get().predict(df)
+
+
+def load_pipelines(names=None, engine=None, lazy=False, variant=None, version=None):
+    """Load several models, keyed by short name. Defaults to all three.
+
+    ``engine`` overrides the GURGAON_MODEL_ENGINE setting ("pipeline" or "compiled"),
+    ``variant`` the GURGAON_MODEL_VARIANT one ("full" or "compact").
+    With ``lazy=True`` each entry is a ``LazyModel`` that loads on first use.
+
+    With GURGAON_MODEL_STORE set, the models come from one version of the
+    shared store instead (``version``, default: current), whose engine and
+    variant were chosen at publish time.
+    """
+    names = list(MODEL_FILES) if names is None else names
+    if MODEL_STORE_DIR is not None:
+        from utils.model_store import attach
+
+        snapshot = attach().snapshot(version)
+        models = {name: snapshot.models[name] for name in names}
+        if not lazy:
+            for model in models.values():
+                model.get()
+        return models
+    if lazy:
+        return {name: LazyModel(name, engine, variant) for name in names}
+    loader = _loader(engine, variant)
+    return {name: loader(name) for name in names}
+
+
+def model_version(names=None):
+    """Version of the models being served.
+
+    Changes whenever a pipeline file is replaced or a new version is published
+    to the shared store, so caches keyed on it never serve predictions from an
+    older model.
+    """
+    if MODEL_STORE_DIR is not None:
+        from utils.model_store import attach
+
+        return attach().version
+    return artifact_version(names)
+
+
+def _derived_paths(name, engine, variant):
+    """Compiled / compact artifacts ``_loader(engine, variant)`` may read for one model."""
+    paths = []
+    if variant == "compact":
+        from utils.compact import compact_path
+
+        paths.append(compact_path(name))
+    if engine == "compiled":
+        # Also the fallback when a compact artifact is missing or stale
+        from utils.tree_engine import compiled_path
+
+        paths.append(compiled_path(name))
+    return paths
+
+
+def artifact_version(names=None, engine=None, variant=None):
+    """Short fingerprint of the artifacts in MODELS_DIR (name, size and mtime).
+
+    Covers each pipeline file plus the compiled or compact file that ``engine``
+    and ``variant`` (default: the configured ones) would load next to it.
+    """
+    import hashlib
+
+    names = list(MODEL_FILES) if names is None else names
+    engine, variant = engine or MODEL_ENGINE, variant or MODEL_VARIANT
+    digest = hashlib.sha1()
+    for name in names:
+        path = MODELS_DIR / MODEL_FILES[name]
+        stat = path.stat()
+        digest.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+        for derived in _derived_paths(name, engine, variant):
+            if not derived.exists():
+                continue
+            stat = derived.stat()
+            digest.update(f"{name}:{variant}:{engine}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return digest.hexdigest()[:12]
+
+
+# ---------------------------------------
+# RE-SAVE FOR MMAP
+# ---------------------------------------
+def resave_for_mmap(name):
+    """Rewrite an artifact with uncompressed ``joblib.dump`` so it can be mmapped.
+
+    Pickles written with ``pickle.dump`` store arrays inline and can't be paged
+    in lazily; joblib's format keeps each array as a raw block in the file.
+    """
+    path = MODELS_DIR / MODEL_FILES[name]
+    model = joblib.load(path)
+    tmp_path = path.with_suffix(".tmp")
+    joblib.dump(model, tmp_path)
+    tmp_path.replace(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Model artifact utilities.")
+    parser.add_argument("--resave", nargs="*", metavar="MODEL",
+                        help="Rewrite artifacts in joblib's mmap-friendly format (default: all)")
+    args = parser.parse_args()
+
+    if args.resave is not None:
+        for name in args.resave or list(MODEL_FILES):
+            resave_for_mmap(name)
+            print(f"Re-saved {MODELS_DIR / MODEL_FILES[name]}")
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
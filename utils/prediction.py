@@ -0,0 +1,198 @@
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from utils.config import ENSEMBLE_WEIGHTS, FEATURE_COLUMNS, NUMERIC_COLUMNS, PRICE_MARGIN
+from utils.metrics import observe, span, timed
+
+# Rows scored per model.predict call in batch mode. Big enough that the
+# per-call overhead of the pipelines disappears, small enough to keep memory flat.
+DEFAULT_CHUNK_SIZE = 10_000
+
+
+# ---------------------------------------
+# CONCURRENT MULTI-MODEL
+# ---------------------------------------
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    # One small pool per process; sklearn trees and XGBoost release the GIL for
+    # most of predict, so threads overlap the three models
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="predict")
+        return _executor
+
+
+def _timed_predict(model, df):
+    start = time.perf_counter()
+    # XGBoost predicts float32; widen so the rounded bounds serialize cleanly
+    price = np.expm1(np.asarray(model.predict(df), dtype=np.float64))
+    return price, time.perf_counter() - start
+
+
+def predict_all(models, df):
+    """Run every model on ``df`` concurrently.
+
+    Returns ``{name: {"price", "low", "high", "seconds"}}`` with one array entry
+    per row, plus the wall-clock time of each model's ``predict`` call.
+    """
+    executor = _get_executor()
+    futures = {name: executor.submit(_timed_predict, model, df) for name, model in models.items()}
+    results = {}
+    for name, future in futures.items():
+        price, seconds = future.result()
+        observe(f"predict.{name}", seconds)
+        results[name] = {
+            "price": price,
+            "low": np.round(price - PRICE_MARGIN, 2),
+            "high": np.round(price + PRICE_MARGIN, 2),
+            "seconds": seconds,
+        }
+    return results
+
+
+def ensemble_range(results, weights=None):
+    """Weighted average of the models' prices, returned as (low, high) arrays."""
+    weights = ENSEMBLE_WEIGHTS if weights is None else weights
+    names = [name for name in results if weights.get(name, 0) > 0]
+    total = sum(weights[name] for name in names)
+    price = sum(results[name]["price"] * (weights[name] / total) for name in names)
+    return np.round(price - PRICE_MARGIN, 2), np.round(price + PRICE_MARGIN, 2)
+
+
+def _yes_no_column(series):
+    # Accept both the UI's "Yes"/"No" and the 0/1 floats the models expect
+    if series.dtype == object or pd.api.types.is_string_dtype(series):
+        lowered = series.astype(str).str.strip().str.lower()
+        mapped = lowered.map({"yes": 1.0, "no": 0.0, "1": 1.0, "0": 0.0, "1.0": 1.0, "0.0": 0.0})
+        return mapped.astype(float)
+    return pd.to_numeric(series, errors="coerce").astype(float)
+
+
+def _balcony_column(series):
+    # Pipelines were trained on balcony as a string ('0', '1', '2', '3', '3+')
+    numeric = pd.to_numeric(series, errors="coerce")
+    fractional = numeric.notna() & (numeric % 1 != 0)
+    if fractional.any():
+        first = fractional.idxmax()
+        raise ValueError(
+            f"{int(fractional.sum())} row(s) have a fractional balcony count (first at row {first})"
+        )
+    as_text = series.astype(str).str.strip()
+    return as_text.where(numeric.isna(), numeric.astype("Int64").astype(str))
+
+
+def prepare_batch(chunk, manifest=None):
+    """Validate and coerce an uploaded chunk into the 12 model input columns.
+
+    With a ``manifest`` (see utils.manifest), rows with categories the models
+    were never trained on are rejected too.
+    """
+    missing = [c for c in FEATURE_COLUMNS if c not in chunk.columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+
+    data = chunk[FEATURE_COLUMNS].copy()
+    for col in ['servant room', 'store room']:
+        data[col] = _yes_no_column(data[col])
+    for col in NUMERIC_COLUMNS:
+        data[col] = pd.to_numeric(data[col], errors="coerce").astype(float)
+    data['balcony'] = _balcony_column(data['balcony'])
+    for col in ['property_type', 'sector', 'agePossession', 'furnishing_type',
+                'luxury_category', 'floor_category']:
+        data[col] = data[col].astype(str).str.strip()
+
+    bad_rows = data[NUMERIC_COLUMNS].isna().any(axis=1)
+    if bad_rows.any():
+        first = bad_rows.idxmax()
+        raise ValueError(f"{int(bad_rows.sum())} row(s) have non-numeric values (first at row {first})")
+
+    if manifest is not None:
+        from utils.manifest import validate_rows
+
+        errors, _ = validate_rows(data, manifest)
+        if errors:
+            raise ValueError("; ".join(errors))
+    return data
+
+
+# ---------------------------------------
+# BATCH FILES
+# ---------------------------------------
+def is_parquet(filename):
+    return str(filename).lower().endswith((".parquet", ".pq"))
+
+
+def iter_input_chunks(source, filename, chunksize=DEFAULT_CHUNK_SIZE):
+    """Yield DataFrame chunks from a CSV or Parquet file (path or file-like)."""
+    if is_parquet(filename):
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(source)
+        for batch in parquet_file.iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(source, chunksize=chunksize)
+
+
+def batch_predict(models, source, filename, chunksize=DEFAULT_CHUNK_SIZE, manifest=None):
+    """Score a whole file, one ``predict`` per model per chunk.
+
+    ``models`` maps a short name (e.g. ``"rf"``) to a fitted pipeline. Yields the
+    original chunk with ``<name>_low`` / ``<name>_high`` columns appended, plus
+    ``ensemble_low`` / ``ensemble_high`` for the weighted combined estimate.
+    """
+    row_offset = 0
+    for chunk in iter_input_chunks(source, filename, chunksize):
+        chunk.index = pd.RangeIndex(row_offset, row_offset + len(chunk))
+        row_offset += len(chunk)
+
+        with span("batch.prepare"):
+            features = prepare_batch(chunk, manifest)
+        result = chunk.copy()
+        predictions = predict_all(models, features)
+        for name, prediction in predictions.items():
+            result[f"{name}_low"] = prediction["low"]
+            result[f"{name}_high"] = prediction["high"]
+        result["ensemble_low"], result["ensemble_high"] = ensemble_range(predictions)
+        yield result
+
+
+@timed("batch.total")
+def write_batch_results(models, source, filename, chunksize=DEFAULT_CHUNK_SIZE, manifest=None):
+    """Run ``batch_predict`` and return (bytes, row_count) in the input's format."""
+    buffer = io.BytesIO()
+    rows = 0
+
+    if is_parquet(filename):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer = None
+        try:
+            for result in batch_predict(models, source, filename, chunksize, manifest):
+                table = pa.Table.from_pandas(result, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(buffer, table.schema)
+                writer.write_table(table)
+                rows += len(result)
+        finally:
+            if writer is not None:
+                writer.close()
+    else:
+        text = io.TextIOWrapper(buffer, encoding="utf-8", newline="")
+        for i, result in enumerate(batch_predict(models, source, filename, chunksize, manifest)):
+            result.to_csv(text, index=False, header=(i == 0))
+            rows += len(result)
+        text.flush()
+        text.detach()
+
+    return buffer.getvalue(), rows
@@ -0,0 +1,98 @@
+"""Precomputed data for the Price Scatter sub-tab.
+
+* OLS trendlines are fitted once per (property type, feature) with NumPy, so
+  the tab never refits statsmodels on a rerun.
+* Above ``SCATTER_POINT_LIMIT`` rows the tab stops shipping every point: it
+  either bins the points into a 2-D count grid on the server or sends a fixed
+  random sample rendered with WebGL.
+"""
+import numpy as np
+import pandas as pd
+
+OVERALL = "Overall"
+SCATTER_FEATURES = ['bathroom', 'balcony', 'floorNum', 'built_up_area', 'luxury_score', 'bedRoom']
+PRICE_COLUMN = 'price_crore'
+
+# Frames larger than this switch to binned / sampled rendering
+SCATTER_POINT_LIMIT = 20_000
+# Points sent to the browser in sampled mode
+MAX_RENDERED_POINTS = 5_000
+# Grid resolution (per axis) for binned mode and the server-side histogram
+DENSITY_BINS = 100
+HISTOGRAM_BINS = 50
+
+
+# ---------------------------------------
+# FRAMES
+# ---------------------------------------
+def build_scatter_frames(df):
+    """Slim per-property-type frames with ``price_crore`` already added."""
+    # Same conversion the tab has always applied to ``price``
+    slim = df[['property_type'] + SCATTER_FEATURES].assign(**{PRICE_COLUMN: df['price'] / 1e7})
+    frames = {OVERALL: slim.drop(columns='property_type')}
+    for property_type, group in slim.groupby('property_type'):
+        frames[property_type] = group.drop(columns='property_type').reset_index(drop=True)
+    return frames
+
+
+# ---------------------------------------
+# OLS
+# ---------------------------------------
+def fit_ols(x, y):
+    """Least-squares line ``y = slope * x + intercept`` over rows where both are present."""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    keep = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[keep], y[keep]
+    if len(x) < 2 or np.ptp(x) == 0:
+        return None
+    slope, intercept = np.polyfit(x, y, 1)
+    residual = y - (slope * x + intercept)
+    total = ((y - y.mean()) ** 2).sum()
+    r2 = 1 - (residual ** 2).sum() / total if total > 0 else np.nan
+    return {
+        "slope": float(slope), "intercept": float(intercept), "r2": float(r2),
+        "n": int(len(x)), "x_min": float(x.min()), "x_max": float(x.max()),
+    }
+
+
+def build_ols_fits(frames):
+    """``{(property_type, feature): fit}`` for every frame and scatter feature."""
+    return {
+        (property_type, feature): fit_ols(frame[feature], frame[PRICE_COLUMN])
+        for property_type, frame in frames.items()
+        for feature in SCATTER_FEATURES
+    }
+
+
+# ---------------------------------------
+# DOWNSAMPLING
+# ---------------------------------------
+def sample_points(frame, max_points=MAX_RENDERED_POINTS, seed=0):
+    """Fixed random subset, so reruns show the same points."""
+    if len(frame) <= max_points:
+        return frame
+    return frame.sample(n=max_points, random_state=seed)
+
+
+def bin_points(x, y, bins=DENSITY_BINS):
+    """2-D histogram of (x, y): returns bin centres and a (y, x) count grid."""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    keep = ~(np.isnan(x) | np.isnan(y))
+    counts, x_edges, y_edges = np.histogram2d(x[keep], y[keep], bins=bins)
+    x_centres = (x_edges[:-1] + x_edges[1:]) / 2
+    y_centres = (y_edges[:-1] + y_edges[1:]) / 2
+    return x_centres, y_centres, counts.T
+
+
+def histogram(values, bins=HISTOGRAM_BINS):
+    """Server-side 1-D histogram as a frame of bin centres and counts."""
+    values = pd.Series(values).dropna().to_numpy(dtype=np.float64)
+    counts, edges = np.histogram(values, bins=bins)
+    return pd.DataFrame({
+        'bin_start': edges[:-1],
+        'bin_centre': (edges[:-1] + edges[1:]) / 2,
+        'width': np.diff(edges),
+        'count': counts,
+    })
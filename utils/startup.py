@@ -0,0 +1,129 @@
+"""Startup-time report: how long each import and artifact load takes.
+
+    python -m utils.startup
+
+Each heavy library is imported in a fresh interpreter so the numbers are real
+cold-start costs, not cache hits from an earlier import in the same process.
+Those numbers overlap (xgboost and seaborn both pull in pandas, for one), so
+the total times the whole list once more in a single interpreter.
+"""
+import subprocess
+import sys
+import time
+
+import pandas as pd
+
+from utils.config import DF_PATH, MODEL_FILES
+
+# Libraries imported by the app pages, roughly in order of first use
+HEAVY_MODULES = [
+    "streamlit",
+    "pandas",
+    "numpy",
+    "joblib",
+    "sklearn.ensemble",
+    "xgboost",
+    "plotly.express",
+    "matplotlib.pyplot",
+    "seaborn",
+    "wordcloud",
+]
+
+
+def time_import(module):
+    """Seconds to import ``module`` in a fresh interpreter, or None if missing."""
+    code = (
+        "import time; start = time.perf_counter(); "
+        f"import {module}; print(time.perf_counter() - start)"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def time_imports(modules):
+    """Seconds to import every available module of ``modules`` in one fresh interpreter."""
+    code = (
+        "import importlib, time; start = time.perf_counter()\n"
+        f"for module in {list(modules)!r}:\n"
+        "    try:\n"
+        "        importlib.import_module(module)\n"
+        "    except ImportError:\n"
+        "        pass\n"
+        "print(time.perf_counter() - start)"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def _rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return usage / 1024 if sys.platform != "darwin" else usage / (1024 * 1024)
+
+
+def time_loads(mmap_mode):
+    """Seconds and peak-RSS growth for df.pkl and each model artifact."""
+    from utils.models import load_pipeline
+
+    rows = []
+    steps = [("df.pkl", lambda: pd.read_pickle(DF_PATH))]
+    steps += [(MODEL_FILES[name], lambda name=name: load_pipeline(name, mmap_mode)) for name in MODEL_FILES]
+    for label, load in steps:
+        rss_before = _rss_mb()
+        start = time.perf_counter()
+        try:
+            load()
+        except FileNotFoundError:
+            rows.append({"step": f"load {label}", "seconds": None, "peak_rss_mb": None})
+            continue
+        seconds = time.perf_counter() - start
+        rss_after = _rss_mb()
+        growth = None if rss_before is None else round(rss_after - rss_before, 1)
+        rows.append({"step": f"load {label}", "seconds": round(seconds, 3), "peak_rss_mb": growth})
+    return rows
+
+
+def startup_report(mmap_mode="r"):
+    rows = []
+    for module in HEAVY_MODULES:
+        seconds = time_import(module)
+        rows.append({
+            "step": f"import {module}",
+            "seconds": None if seconds is None else round(seconds, 3),
+            "peak_rss_mb": None,
+        })
+    rows += time_loads(mmap_mode)
+    return pd.DataFrame(rows)
+
+
+def main():
+    import argparse
+
+    from utils.config import MODEL_MMAP_MODE
+
+    parser = argparse.ArgumentParser(description="Break down cold-start import and load costs.")
+    parser.add_argument("--no-mmap", action="store_true", help="Load artifacts fully into memory")
+    args = parser.parse_args()
+
+    report = startup_report(None if args.no_mmap else MODEL_MMAP_MODE)
+    print(report.to_string(index=False, na_rep="n/a"))
+    # Per-module import times share dependencies, so they don't add up
+    imports = time_imports(HEAVY_MODULES)
+    loads = report.loc[report["step"].str.startswith("load "), "seconds"].sum()
+    if imports is None:
+        print(f"\nLoads: {loads:.2f} s (imports failed in one interpreter)")
+    else:
+        print(f"\nAll imports, one interpreter: {imports:.2f} s")
+        print(f"Total (imports + loads): {imports + loads:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
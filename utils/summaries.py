@@ -0,0 +1,108 @@
+"""Pre-aggregated summary cubes for the BHK pie and box-plot tabs.
+
+Charts render from these compact tables instead of the row-level listings, so
+the payload sent to the browser depends on the number of sectors and BHK
+values, not on the number of listings.
+
+Every cube has ``sector`` and ``property_type`` columns where ``"overall"``
+marks the roll-up across that dimension.
+"""
+import pandas as pd
+
+OVERALL = "overall"
+
+# Outliers kept per box at each end (highest and lowest); the rest are dropped
+MAX_OUTLIERS_PER_SIDE = 50
+
+
+def _with_rollups(df, func):
+    """Apply ``func`` at (sector, type), (sector, overall), (overall, type) and (overall, overall)."""
+    parts = []
+    for sector_key, type_key in (('sector', 'property_type'), ('sector', None),
+                                 (None, 'property_type'), (None, None)):
+        view = df.assign(
+            sector=df['sector'] if sector_key else OVERALL,
+            property_type=df['property_type'] if type_key else OVERALL,
+        )
+        parts.append(func(view))
+    return pd.concat(parts, ignore_index=True)
+
+
+# ---------------------------------------
+# BHK COUNTS
+# ---------------------------------------
+def bhk_counts(df):
+    """Listings per (sector, property_type, bedRoom)."""
+    return _with_rollups(
+        df,
+        lambda view: view.groupby(['sector', 'property_type', 'bedRoom']).size()
+        .rename('count').reset_index()
+    )
+
+
+def add_counts(cube, other):
+    """Sum two ``bhk_counts`` cubes, e.g. the stored one and a new batch's."""
+    if cube is None:
+        return other
+    keys = ['sector', 'property_type', 'bedRoom']
+    return pd.concat([cube, other], ignore_index=True).groupby(keys, as_index=False)['count'].sum()
+
+
+def subtract_counts(cube, other):
+    """Take a batch's ``bhk_counts`` back out of ``cube``, dropping emptied cells."""
+    merged = add_counts(cube, other.assign(count=-other['count']))
+    return merged[merged['count'] > 0].reset_index(drop=True)
+
+
+def select(cube, sector=OVERALL, property_type=OVERALL):
+    """Rows of ``cube`` for one (sector, property_type) filter."""
+    return cube[(cube['sector'] == sector) & (cube['property_type'] == property_type)]
+
+
+# ---------------------------------------
+# BOX STATS
+# ---------------------------------------
+def _box_stats(view, value):
+    keys = ['sector', 'property_type', 'bedRoom']
+    data = view[keys + [value]].dropna()
+    grouped = data.groupby(keys)[value]
+    stats = grouped.quantile([0.25, 0.5, 0.75]).unstack()
+    stats.columns = ['q1', 'median', 'q3']
+    stats['mean'] = grouped.mean()
+    stats['count'] = grouped.size()
+    iqr = stats['q3'] - stats['q1']
+    stats['low_limit'] = stats['q1'] - 1.5 * iqr
+    stats['high_limit'] = stats['q3'] + 1.5 * iqr
+
+    # Whiskers stop at the furthest data point inside the 1.5 IQR limits (Plotly's rule)
+    joined = data.join(stats[['low_limit', 'high_limit']], on=keys)
+    inside = joined[value].between(joined['low_limit'], joined['high_limit'])
+    fences = joined[inside].groupby(keys)[value].agg(lowerfence='min', upperfence='max')
+    stats = stats.join(fences)
+
+    outliers = joined[~inside]
+    if len(outliers):
+        rank_low = outliers.groupby(keys)[value].rank(method='first')
+        rank_high = outliers.groupby(keys)[value].rank(method='first', ascending=False)
+        kept = outliers[(rank_low <= MAX_OUTLIERS_PER_SIDE) | (rank_high <= MAX_OUTLIERS_PER_SIDE)]
+        stats['outliers'] = kept.groupby(keys)[value].agg(list)
+    else:
+        stats['outliers'] = None
+    stats['outliers'] = stats['outliers'].apply(lambda x: x if isinstance(x, list) else [])
+    return stats.drop(columns=['low_limit', 'high_limit']).reset_index()
+
+
+def price_box_stats(df, value='price'):
+    """Quartiles, whiskers, mean and capped outliers per (sector, type, bedRoom)."""
+    return _with_rollups(df, lambda view: _box_stats(view, value))
+
+
+# ---------------------------------------
+# BUILD ALL
+# ---------------------------------------
+def build_summaries(df):
+    """All cubes used by the dashboard, keyed by name."""
+    return {
+        'bhk_counts': bhk_counts(df),
+        'price_box': price_box_stats(df),
+    }
@@ -0,0 +1,43 @@
+"""What-if sweeps: price one property across a whole domain in one batch.
+
+The predictor page's current inputs are repeated once per value of the swept
+field (every sector, or a grid of built-up areas) and the grid is scored with a
+single ``predict`` per model via ``predict_all``.
+"""
+import numpy as np
+import pandas as pd
+
+from utils.prediction import ensemble_range, predict_all
+
+# Points on the built-up area curve
+AREA_GRID_POINTS = 60
+
+
+def sweep_frame(base, field, values):
+    """Repeat the one-row frame ``base`` for each value of ``field``."""
+    frame = base.loc[base.index.repeat(len(values))].reset_index(drop=True)
+    frame[field] = list(values)
+    return frame
+
+
+def area_grid(low, high, points=AREA_GRID_POINTS):
+    return np.round(np.linspace(low, high, points), 0)
+
+
+def run_sweep(models, base, field, values):
+    """Score every value of ``field`` for the ``base`` property.
+
+    Returns one row per value with each model's price, the ensemble range and
+    its midpoint, and the value's rank (1 = most expensive).
+    """
+    frame = sweep_frame(base, field, values)
+    results = predict_all(models, frame)
+    low, high = ensemble_range(results)
+    table = pd.DataFrame({field: frame[field]})
+    for name, result in results.items():
+        table[name] = np.round(result["price"], 2)
+    table["ensemble_low"] = low
+    table["ensemble_high"] = high
+    table["ensemble"] = np.round((low + high) / 2, 2)
+    table["rank"] = table["ensemble"].rank(ascending=False, method="min").astype(int)
+    return table, {name: result["seconds"] for name, result in results.items()}
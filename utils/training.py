@@ -0,0 +1,286 @@
+"""Reproducible training for the three deployed pipelines.
+
+    python -m utils.training --data listings_with_price.pkl
+    python -m utils.training --data train.csv --quick          # CI-sized run
+    python -m utils.training --data train.csv --promote        # also deploy
+
+The training frame needs the 12 input columns of ``df.pkl`` plus ``price``
+(in Cr). Models learn ``log1p(price)``, which is what the predictor's
+``expm1`` inverts. ``df.pkl`` itself ships without prices, so it can only
+be used once a ``price`` column has been joined back onto it.
+
+Every (model, hyperparameters, fold) fit runs as a separate task in a process
+pool that uses all cores. Each fold's preprocessing is fitted once, cached on
+disk with ``joblib.Memory``, and reused by every candidate and model. Each run
+writes its pipelines and ``metrics.json`` to ``models/versions/<version>/``.
+``--promote`` copies them over the artifacts the app loads.
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from utils.config import FEATURE_COLUMNS, MODEL_FILES, MODELS_DIR, NUMERIC_COLUMNS
+
+TARGET_COLUMN = 'price'
+SEED = 42
+DEFAULT_FOLDS = 5
+VERSIONS_DIR = MODELS_DIR / "versions"
+# Fold preprocessing cache, shared by the worker processes
+TRAINING_CACHE_DIR = MODELS_DIR / ".training_cache"
+
+ORDINAL_COLUMNS = ['property_type', 'sector', 'balcony', 'agePossession',
+                   'furnishing_type', 'luxury_category', 'floor_category']
+ONE_HOT_COLUMNS = ['sector', 'agePossession']
+
+# Candidates per model. Kept small so a full search fits in a CI job; the
+# first entry of each list is the configuration used with --quick.
+SEARCH_SPACE = {
+    "rf": {"n_estimators": [300, 500], "max_depth": [None, 20], "max_features": [1.0, 0.5]},
+    "xgb": {"n_estimators": [500, 300], "max_depth": [5, 7], "learning_rate": [0.05, 0.1]},
+    "ext": {"n_estimators": [300, 500], "max_depth": [None, 20], "max_features": [1.0, 0.5]},
+}
+
+
+# ---------------------------------------
+# DATA
+# ---------------------------------------
+def load_training_data(path):
+    """Return (features, log target) from a pickle, Parquet or CSV file."""
+    suffix = path.suffix.lower()
+    if suffix == ".parquet":
+        df = pd.read_parquet(path)
+    elif suffix == ".csv":
+        df = pd.read_csv(path)
+    else:
+        df = pd.read_pickle(path)
+
+    missing = [col for col in FEATURE_COLUMNS + [TARGET_COLUMN] if col not in df.columns]
+    if missing:
+        raise ValueError(
+            f"{path} is missing {missing}. Training needs the model input columns plus "
+            f"'{TARGET_COLUMN}' (in Cr); df.pkl only holds the inputs, so join prices onto it "
+            "or pass a frame that has them with --data."
+        )
+    df = df.dropna(subset=[TARGET_COLUMN]).reset_index(drop=True)
+    return df[FEATURE_COLUMNS], np.log1p(df[TARGET_COLUMN].to_numpy(dtype=np.float64))
+
+
+def data_fingerprint(X, y):
+    digest = hashlib.sha1(pd.util.hash_pandas_object(X, index=False).values.tobytes())
+    digest.update(np.ascontiguousarray(y).tobytes())
+    return digest.hexdigest()[:12]
+
+
+# ---------------------------------------
+# PIPELINES
+# ---------------------------------------
+def make_preprocessor():
+    from sklearn.compose import ColumnTransformer
+    from sklearn.preprocessing import OneHotEncoder, OrdinalEncoder, StandardScaler
+
+    return ColumnTransformer([
+        ('num', StandardScaler(), NUMERIC_COLUMNS),
+        ('cat', OrdinalEncoder(handle_unknown='use_encoded_value', unknown_value=-1), ORDINAL_COLUMNS),
+        ('cat1', OneHotEncoder(drop='first', sparse_output=False, handle_unknown='ignore'), ONE_HOT_COLUMNS),
+    ], remainder='passthrough')
+
+
+def make_regressor(name, params, n_jobs=1):
+    if name == "rf":
+        from sklearn.ensemble import RandomForestRegressor
+        return RandomForestRegressor(random_state=SEED, n_jobs=n_jobs, **params)
+    if name == "ext":
+        from sklearn.ensemble import ExtraTreesRegressor
+        return ExtraTreesRegressor(random_state=SEED, n_jobs=n_jobs, **params)
+    if name == "xgb":
+        from xgboost import XGBRegressor
+        return XGBRegressor(random_state=SEED, n_jobs=n_jobs, **params)
+    raise ValueError(f"Unknown model '{name}'")
+
+
+def make_pipeline(name, params, n_jobs=-1):
+    from sklearn.pipeline import Pipeline
+
+    return Pipeline([('preprocessor', make_preprocessor()), ('regressor', make_regressor(name, params, n_jobs))])
+
+
+def candidates(name, quick=False):
+    from sklearn.model_selection import ParameterGrid
+
+    space = SEARCH_SPACE[name]
+    if quick:
+        return [{key: values[0] for key, values in space.items()}]
+    return list(ParameterGrid(space))
+
+
+# ---------------------------------------
+# CROSS-VALIDATION
+# ---------------------------------------
+def _fit_transform_fold(X, train_idx, test_idx):
+    preprocessor = make_preprocessor()
+    X_train = preprocessor.fit_transform(X.iloc[train_idx])
+    return X_train, preprocessor.transform(X.iloc[test_idx])
+
+
+def _cached_transform(X, train_idx, test_idx):
+    memory = joblib.Memory(TRAINING_CACHE_DIR, verbose=0)
+    return memory.cache(_fit_transform_fold)(X, train_idx, test_idx)
+
+
+def _evaluate(name, params, fold, X, y, train_idx, test_idx):
+    """One CV fit; runs in a worker process."""
+    from sklearn.metrics import mean_absolute_error, r2_score
+
+    X_train, X_test = _cached_transform(X, train_idx, test_idx)
+    model = make_regressor(name, params).fit(X_train, y[train_idx])
+    predicted = model.predict(X_test)
+    return {
+        "model": name,
+        "params": params,
+        "fold": fold,
+        # R² on the log target, as reported in the README; MAE in Cr
+        "r2": float(r2_score(y[test_idx], predicted)),
+        "mae": float(mean_absolute_error(np.expm1(y[test_idx]), np.expm1(predicted))),
+    }
+
+
+def cross_validate(X, y, names, folds=DEFAULT_FOLDS, quick=False, workers=None):
+    """Score every candidate of every model on the same folds, in parallel."""
+    from sklearn.model_selection import KFold
+
+    splits = list(KFold(folds, shuffle=True, random_state=SEED).split(X))
+    # Fill the cache up front so workers only ever read it
+    for train_idx, test_idx in splits:
+        _cached_transform(X, train_idx, test_idx)
+
+    tasks = [
+        (name, params, fold, X, y, train_idx, test_idx)
+        for name in names
+        for params in candidates(name, quick)
+        for fold, (train_idx, test_idx) in enumerate(splits)
+    ]
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        return list(pool.map(_evaluate, *zip(*tasks)))
+
+
+def summarize(scores):
+    """Mean/std per (model, params), best candidate first within each model."""
+    table = pd.DataFrame(scores)
+    table["params"] = table["params"].map(lambda p: json.dumps(p, sort_keys=True))
+    summary = (
+        table.groupby(["model", "params"])
+        .agg(r2_mean=("r2", "mean"), r2_std=("r2", "std"), mae_mean=("mae", "mean"), folds=("fold", "count"))
+        .reset_index()
+        .sort_values(["model", "r2_mean"], ascending=[True, False])
+    )
+    return summary
+
+
+# ---------------------------------------
+# TRAIN / SAVE
+# ---------------------------------------
+def train(data_path, names=None, folds=DEFAULT_FOLDS, quick=False, workers=None):
+    """Search, refit the winners on all rows and write a versioned run directory."""
+    import sklearn
+    import xgboost
+
+    names = list(MODEL_FILES) if names is None else names
+    X, y = load_training_data(data_path)
+    fingerprint = data_fingerprint(X, y)
+
+    summary = summarize(cross_validate(X, y, names, folds, quick, workers))
+    best = {name: json.loads(summary[summary["model"] == name].iloc[0]["params"]) for name in names}
+
+    version = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}-{fingerprint}"
+    run_dir = VERSIONS_DIR / version
+    run_dir.mkdir(parents=True, exist_ok=True)
+    for name in names:
+        pipeline = make_pipeline(name, best[name]).fit(X, y)
+        # Uncompressed joblib, so the app can memory-map the arrays
+        joblib.dump(pipeline, run_dir / MODEL_FILES[name])
+
+    metrics = {
+        "version": version,
+        "trained_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "data": {"path": str(data_path), "rows": len(X), "fingerprint": fingerprint},
+        "seed": SEED,
+        "folds": folds,
+        "quick": quick,
+        "libraries": {"python": platform.python_version(), "scikit-learn": sklearn.__version__,
+                      "xgboost": xgboost.__version__},
+        "best": {
+            name: {"params": best[name], **summary[summary["model"] == name].iloc[0][["r2_mean", "r2_std", "mae_mean"]].to_dict()}
+            for name in names
+        },
+        "candidates": summary.to_dict(orient="records"),
+    }
+    (run_dir / "metrics.json").write_text(json.dumps(metrics, indent=2))
+    return run_dir, metrics
+
+
+def promote(run_dir, data_path):
+    """Copy a run's artifacts over the deployed ones and refresh the manifest.
+
+    Compiled and compact artifacts built from the replaced pipelines are
+    deleted; returns their paths so they can be rebuilt.
+    """
+    import shutil
+
+    from utils.compact import compact_path
+    from utils.manifest import write_manifest
+    from utils.tree_engine import compiled_path
+
+    removed = []
+    for name, filename in MODEL_FILES.items():
+        source = run_dir / filename
+        if not source.exists():
+            continue
+        tmp_path = MODELS_DIR / f"{filename}.tmp"
+        shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, MODELS_DIR / filename)
+        for derived in (compiled_path(name), compact_path(name)):
+            if derived.exists():
+                derived.unlink()
+                removed.append(derived)
+    write_manifest(load_training_data(data_path)[0])
+    return removed
+
+
+def main():
+    from pathlib import Path
+
+    parser = argparse.ArgumentParser(description="Train the three price pipelines.")
+    parser.add_argument("--data", type=Path, required=True,
+                        help="Training frame with the input columns and 'price' (pkl, parquet or csv)")
+    parser.add_argument("--models", nargs="+", choices=list(MODEL_FILES), default=None)
+    parser.add_argument("--folds", type=int, default=DEFAULT_FOLDS)
+    parser.add_argument("--quick", action="store_true", help="One candidate per model (CI smoke run)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--promote", action="store_true", help="Deploy the new artifacts to models/")
+    args = parser.parse_args()
+
+    try:
+        run_dir, metrics = train(args.data, args.models, args.folds, args.quick, args.workers)
+    except ValueError as err:
+        parser.error(str(err))
+
+    for name, best in metrics["best"].items():
+        print(f"{name}: R² {best['r2_mean']:.4f} ± {best['r2_std']:.4f}, MAE {best['mae_mean']:.3f} Cr  {best['params']}")
+    print(f"\nArtifacts and metrics in {run_dir}")
+    if args.promote:
+        removed = promote(run_dir, args.data)
+        print(f"Promoted to {MODELS_DIR}")
+        for path in removed:
+            print(f"  removed stale {path.name}; rebuild it with utils.tree_engine / utils.compact")
+
+
+if __name__ == "__main__":
+    main()
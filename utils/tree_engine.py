@@ -0,0 +1,503 @@
+"""Compiled, array-backed inference for the tree-ensemble pipelines.
+
+``compile_pipeline`` turns a fitted sklearn ``Pipeline`` (ColumnTransformer +
+tree ensemble) into a ``CompiledPipeline``:
+
+* preprocessing becomes precomputed category -> index maps and scaler constants
+* every tree is flattened into contiguous NumPy node arrays
+  (feature, threshold, left, right, value) shared by the whole ensemble
+
+Prediction is then a vectorized walk of all trees at once, level by level, with
+no per-tree Python calls. ``predict`` returns the same log-scale values as the
+original pipeline, so it can be used anywhere a pipeline is.
+
+    python -m utils.tree_engine rf ext            # compile, check parity, save
+    python -m utils.tree_engine rf --no-save      # parity check only
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+# Rows walked through the trees at once; bounds the (rows x trees) index matrix
+TRAVERSAL_CHUNK = 4096
+
+
+class UnsupportedPipelineError(ValueError):
+    """Raised when a pipeline contains a step the engine cannot compile."""
+
+
+# ---------------------------------------
+# PREPROCESSING
+# ---------------------------------------
+class _NumericBlock:
+    """Columns cast to float, optionally scaled as ``x * scale + offset``."""
+
+    def __init__(self, columns, scale=None, offset=None):
+        self.columns = list(columns)
+        self.width = len(self.columns)
+        self.scale = None if scale is None else np.asarray(scale, dtype=np.float64)
+        self.offset = None if offset is None else np.asarray(offset, dtype=np.float64)
+
+    def fill(self, frame, out, start):
+        values = np.column_stack([frame[col].to_numpy(dtype=np.float64) for col in self.columns])
+        if self.scale is not None:
+            values = values * self.scale
+        if self.offset is not None:
+            values = values + self.offset
+        out[:, start:start + self.width] = values
+
+
+class _OrdinalBlock:
+    """OrdinalEncoder: one output column per input, value = category index."""
+
+    def __init__(self, columns, categories, unknown_value=None):
+        self.columns = list(columns)
+        self.width = len(self.columns)
+        self.maps = [_category_map(cats) for cats in categories]
+        self.unknown_value = unknown_value
+
+    def fill(self, frame, out, start):
+        for j, (col, mapping) in enumerate(zip(self.columns, self.maps)):
+            codes = _encode(frame, col, mapping).astype(np.float64)
+            unknown = codes < 0
+            if unknown.any():
+                if self.unknown_value is None:
+                    raise ValueError(f"Found unknown categories in column '{col}'")
+                codes[unknown] = self.unknown_value
+            out[:, start + j] = codes
+
+
+class _OneHotBlock:
+    """OneHotEncoder: each category maps to a fixed output column (or none)."""
+
+    def __init__(self, columns, categories, drop_idx, ignore_unknown):
+        self.columns = list(columns)
+        self.maps = [_category_map(cats) for cats in categories]
+        self.ignore_unknown = ignore_unknown
+        # positions[j][k] = output offset of category k of column j, -1 if dropped
+        self.positions = []
+        offset = 0
+        for j, cats in enumerate(categories):
+            dropped = None if drop_idx is None else drop_idx[j]
+            pos = np.full(len(cats), -1, dtype=np.int64)
+            for k in range(len(cats)):
+                if dropped is not None and k == dropped:
+                    continue
+                pos[k] = offset
+                offset += 1
+            self.positions.append(pos)
+        self.width = offset
+
+    def fill(self, frame, out, start):
+        rows = np.arange(len(frame))
+        for col, mapping, pos in zip(self.columns, self.maps, self.positions):
+            codes = _encode(frame, col, mapping)
+            known = codes >= 0
+            if not known.all() and not self.ignore_unknown:
+                raise ValueError(f"Found unknown categories in column '{col}'")
+            target = np.where(known, pos[np.maximum(codes, 0)], -1)
+            hit = target >= 0
+            out[rows[hit], start + target[hit]] = 1.0
+
+
+class _LookupBlock:
+    """Any fitted single-column transformer, precomputed for a known domain.
+
+    Used for encoders the engine has no native support for (e.g. target
+    encoders): the transformer is evaluated once for every value in the
+    reference data and the outputs are stored as a lookup table.
+    """
+
+    def __init__(self, column, domain, table):
+        self.columns = [column]
+        self.map = _category_map(domain)
+        self.table = table
+        self.width = table.shape[1]
+
+    def fill(self, frame, out, start):
+        codes = _encode(frame, self.columns[0], self.map)
+        if (codes < 0).any():
+            raise ValueError(f"Found unknown categories in column '{self.columns[0]}'")
+        out[:, start:start + self.width] = self.table[codes]
+
+
+def _category_map(categories):
+    return {value: code for code, value in enumerate(categories)}
+
+
+def _encode(frame, col, mapping):
+    """Category codes for one column, -1 for values outside the fitted categories."""
+    values = frame[col].to_numpy(dtype=object)
+    return np.fromiter((mapping.get(v, -1) for v in values), dtype=np.int64, count=len(values))
+
+
+def _resolve_columns(spec, feature_names):
+    if isinstance(spec, str):
+        return [spec]
+    if isinstance(spec, slice):
+        return list(feature_names[spec])
+    spec = list(spec)
+    if spec and isinstance(spec[0], (bool, np.bool_)):
+        return [name for name, keep in zip(feature_names, spec) if keep]
+    return [feature_names[c] if isinstance(c, (int, np.integer)) else c for c in spec]
+
+
+def _compile_transformer(transformer, columns, reference):
+    from sklearn.preprocessing import MinMaxScaler, OneHotEncoder, OrdinalEncoder, StandardScaler
+
+    if transformer == "passthrough":
+        return _NumericBlock(columns)
+    if isinstance(transformer, StandardScaler):
+        scale = None if transformer.scale_ is None else 1.0 / transformer.scale_
+        offset = None
+        if transformer.mean_ is not None and transformer.with_mean:
+            offset = -transformer.mean_ * (1.0 if scale is None else scale)
+        return _NumericBlock(columns, scale, offset)
+    if isinstance(transformer, MinMaxScaler):
+        return _NumericBlock(columns, transformer.scale_, transformer.min_)
+    if isinstance(transformer, OrdinalEncoder):
+        unknown_value = None
+        if transformer.handle_unknown == "use_encoded_value":
+            unknown_value = transformer.unknown_value
+        return _OrdinalBlock(columns, transformer.categories_, unknown_value)
+    if isinstance(transformer, OneHotEncoder):
+        if getattr(transformer, "_infrequent_enabled", False):
+            raise UnsupportedPipelineError("OneHotEncoder with infrequent categories is not supported")
+        drop_idx = getattr(transformer, "drop_idx_", None)
+        ignore_unknown = transformer.handle_unknown != "error"
+        return _OneHotBlock(columns, transformer.categories_, drop_idx, ignore_unknown)
+
+    # Fallback: tabulate single-column transformers over the reference domain
+    if reference is not None and len(columns) == 1 and hasattr(transformer, "transform"):
+        domain = list(pd.unique(reference[columns[0]].dropna()))
+        sample = pd.DataFrame({columns[0]: pd.Series(domain, dtype=object)})
+        table = np.asarray(transformer.transform(sample), dtype=np.float64)
+        return _LookupBlock(columns[0], domain, table.reshape(len(domain), -1))
+
+    raise UnsupportedPipelineError(f"Cannot compile transformer {type(transformer).__name__}")
+
+
+def _compile_column_transformer(ct, reference):
+    feature_names = list(ct.feature_names_in_)
+    blocks = []
+    for name, transformer, spec in ct.transformers_:
+        if transformer == "drop":
+            continue
+        columns = _resolve_columns(spec, feature_names)
+        if not columns:
+            continue
+        block = _compile_transformer(transformer, columns, reference)
+        expected = ct.output_indices_[name]
+        if block.width != expected.stop - expected.start:
+            raise UnsupportedPipelineError(f"Output width mismatch for transformer '{name}'")
+        blocks.append(block)
+    return blocks
+
+
+# ---------------------------------------
+# TREES
+# ---------------------------------------
+class TreeArrays:
+    """All trees of an ensemble packed into shared, contiguous node arrays.
+
+    Leaves point to themselves (left == right == own index, threshold = +inf), so
+    a walk that overshoots a leaf stays on it.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, missing_left, roots, max_depth,
+                 aggregate="mean", base_score=0.0):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.missing_left = missing_left
+        self.roots = roots
+        self.max_depth = max_depth
+        self.aggregate = aggregate
+        self.base_score = base_score
+        self.is_leaf = left == np.arange(len(left))
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    def leaf_values(self, X):
+        """Return the (rows x trees) matrix of leaf values for float32 input ``X``."""
+        n_rows, n_features = X.shape
+        flat_x = np.ascontiguousarray(X).ravel()
+        node = np.tile(self.roots, n_rows)
+        base = np.repeat(np.arange(n_rows) * n_features, self.n_trees)
+        # Only (row, tree) pairs still sitting on an internal node keep walking
+        active = np.flatnonzero(~self.is_leaf[node])
+        while active.size:
+            current = node[active]
+            x = flat_x[base[active] + self.feature[current]]
+            go_left = (x <= self.threshold[current]) | (np.isnan(x) & self.missing_left[current])
+            step = np.where(go_left, self.left[current], self.right[current])
+            node[active] = step
+            active = active[~self.is_leaf[step]]
+        return self.value[node].reshape(n_rows, self.n_trees)
+
+    def predict(self, X):
+        out = np.empty(X.shape[0], dtype=np.float64)
+        for start in range(0, X.shape[0], TRAVERSAL_CHUNK):
+            leaves = self.leaf_values(X[start:start + TRAVERSAL_CHUNK])
+            if self.aggregate == "mean":
+                out[start:start + len(leaves)] = leaves.mean(axis=1)
+            else:
+                out[start:start + len(leaves)] = leaves.sum(axis=1) + self.base_score
+        return out
+
+
+def _pack(trees, aggregate="mean", base_score=0.0):
+    """Pack a list of per-tree node dicts into one ``TreeArrays``."""
+    sizes = [len(t["feature"]) for t in trees]
+    offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int32)
+    feature = np.concatenate([t["feature"] for t in trees]).astype(np.int32)
+    threshold = np.concatenate([t["threshold"] for t in trees]).astype(np.float64)
+    value = np.concatenate([t["value"] for t in trees]).astype(np.float64)
+    missing_left = np.concatenate([t["missing_left"] for t in trees]).astype(bool)
+    left = np.concatenate([np.where(t["left"] < 0, np.arange(n), t["left"]) + off
+                           for t, n, off in zip(trees, sizes, offsets)]).astype(np.int32)
+    right = np.concatenate([np.where(t["right"] < 0, np.arange(n), t["right"]) + off
+                            for t, n, off in zip(trees, sizes, offsets)]).astype(np.int32)
+
+    leaf = left == np.arange(len(left))
+    feature[leaf] = 0
+    threshold[leaf] = np.inf
+    max_depth = max(t["depth"] for t in trees)
+    return TreeArrays(feature, threshold, left, right, value, missing_left, offsets,
+                      max_depth, aggregate, base_score)
+
+
+def _sklearn_tree(estimator):
+    tree = estimator.tree_
+    missing = getattr(tree, "missing_go_to_left", None)
+    return {
+        "feature": tree.feature,
+        "threshold": tree.threshold,
+        "left": tree.children_left,
+        "right": tree.children_right,
+        "value": tree.value[:, 0, 0],
+        "missing_left": np.zeros(tree.node_count, bool) if missing is None else missing.astype(bool),
+        "depth": tree.max_depth,
+    }
+
+
+def _xgb_trees(booster):
+    feature_names = booster.feature_names
+    trees = []
+    for dump in booster.get_dump(dump_format="json"):
+        nodes = {}
+        stack = [(json.loads(dump), 0)]
+        depth = 0
+        while stack:
+            node, level = stack.pop()
+            nodes[node["nodeid"]] = node
+            depth = max(depth, level)
+            stack.extend((child, level + 1) for child in node.get("children", []))
+
+        n = max(nodes) + 1
+        tree = {
+            "feature": np.full(n, -2), "threshold": np.full(n, np.inf),
+            "left": np.full(n, -1), "right": np.full(n, -1),
+            "value": np.zeros(n), "missing_left": np.zeros(n, bool), "depth": depth,
+        }
+        for nid, node in nodes.items():
+            if "leaf" in node:
+                tree["value"][nid] = node["leaf"]
+                continue
+            split = node["split"]
+            if feature_names is not None and split in feature_names:
+                tree["feature"][nid] = feature_names.index(split)
+            else:
+                tree["feature"][nid] = int(str(split).lstrip("f"))
+            # XGBoost tests x < t in float32; x <= previous float32 is equivalent
+            tree["threshold"][nid] = np.nextafter(np.float32(node["split_condition"]), np.float32(-np.inf))
+            tree["left"][nid] = node["yes"]
+            tree["right"][nid] = node["no"]
+            tree["missing_left"][nid] = node["missing"] == node["yes"]
+        trees.append(tree)
+    return trees
+
+
+def _xgb_base_margin(booster, trees):
+    # The global bias is stored differently across XGBoost versions; reading it
+    # back from a real prediction is the one way that works for all of them
+    import xgboost
+
+    probe = np.zeros((1, booster.num_features()), dtype=np.float32)
+    margin = booster.predict(xgboost.DMatrix(probe, feature_names=booster.feature_names),
+                             output_margin=True)
+    return float(margin[0]) - float(trees.leaf_values(probe).sum())
+
+
+def _compile_estimator(estimator):
+    from sklearn.tree import DecisionTreeRegressor
+
+    if isinstance(estimator, DecisionTreeRegressor):
+        return _pack([_sklearn_tree(estimator)])
+    if hasattr(estimator, "estimators_") and all(
+        isinstance(e, DecisionTreeRegressor) for e in estimator.estimators_
+    ):
+        return _pack([_sklearn_tree(e) for e in estimator.estimators_])
+    if hasattr(estimator, "get_booster"):
+        booster = estimator.get_booster()
+        trees = _pack(_xgb_trees(booster), aggregate="sum")
+        trees.base_score = _xgb_base_margin(booster, trees)
+        return trees
+    raise UnsupportedPipelineError(f"Cannot compile estimator {type(estimator).__name__}")
+
+
+# ---------------------------------------
+# COMPILED PIPELINE
+# ---------------------------------------
+class CompiledPipeline:
+    """Flat replacement for a fitted preprocessing + tree-ensemble pipeline.
+
+    ``source`` fingerprints the pipeline file it was compiled from (see
+    ``utils.models.source_fingerprint``); loaders refuse a saved artifact whose
+    fingerprint no longer matches.
+    """
+
+    # Artifacts saved before fingerprints existed never match
+    source = None
+
+    def __init__(self, input_columns, blocks, post_blocks, trees, source=None):
+        self.input_columns = input_columns
+        self.blocks = blocks
+        self.post_blocks = post_blocks
+        self.trees = trees
+        self.source = source
+        self.n_features = sum(block.width for block in blocks)
+
+    def transform(self, frame):
+        out = np.zeros((len(frame), self.n_features), dtype=np.float64)
+        start = 0
+        for block in self.blocks:
+            block.fill(frame, out, start)
+            start += block.width
+        for scale, offset in self.post_blocks:
+            out = out * scale + offset
+        # The tree code in sklearn and XGBoost compares float32 features
+        return out.astype(np.float32)
+
+    def predict(self, frame):
+        return self.trees.predict(self.transform(frame))
+
+
+def compile_pipeline(pipeline, reference=None):
+    """Compile a fitted ``Pipeline`` into a ``CompiledPipeline``.
+
+    ``reference`` is an optional DataFrame of training-like rows, used to
+    tabulate single-column encoders the engine does not support natively.
+    """
+    from sklearn.compose import ColumnTransformer
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import MinMaxScaler, StandardScaler
+
+    steps = [step for _, step in pipeline.steps] if isinstance(pipeline, Pipeline) else [pipeline]
+    *transformers, estimator = steps
+
+    blocks = None
+    post_blocks = []
+    for step in transformers:
+        if step is None or step == "passthrough":
+            continue
+        if isinstance(step, ColumnTransformer) and blocks is None and not post_blocks:
+            blocks = _compile_column_transformer(step, reference)
+        elif isinstance(step, StandardScaler) and blocks is not None:
+            scale = 1.0 if step.scale_ is None else 1.0 / step.scale_
+            offset = 0.0 if step.mean_ is None or not step.with_mean else -step.mean_ * scale
+            post_blocks.append((scale, offset))
+        elif isinstance(step, MinMaxScaler) and blocks is not None:
+            post_blocks.append((step.scale_, step.min_))
+        else:
+            raise UnsupportedPipelineError(f"Cannot compile pipeline step {type(step).__name__}")
+
+    if blocks is None:
+        raise UnsupportedPipelineError("Pipeline needs a ColumnTransformer as its first step")
+
+    input_columns = [col for block in blocks for col in block.columns]
+    return CompiledPipeline(input_columns, blocks, post_blocks, _compile_estimator(estimator))
+
+
+# ---------------------------------------
+# PARITY
+# ---------------------------------------
+def check_parity(pipeline, compiled, frame, rtol=1e-5, atol=1e-6):
+    """Compare compiled and original predictions on ``frame``.
+
+    Returns a dict with the max absolute difference on the model's log-scale
+    output and on the ``np.expm1`` price, and whether every row matches within
+    ``atol + rtol * |expected|`` (XGBoost accumulates its leaves in float32).
+    """
+    expected = np.asarray(pipeline.predict(frame), dtype=np.float64)
+    actual = compiled.predict(frame)
+    expected_price, actual_price = np.expm1(expected), np.expm1(actual)
+    return {
+        "rows": len(frame),
+        "max_log_diff": float(np.max(np.abs(expected - actual), initial=0.0)),
+        "max_price_diff": float(np.max(np.abs(expected_price - actual_price), initial=0.0)),
+        "ok": bool(np.allclose(actual, expected, rtol=rtol, atol=atol)
+                   and np.allclose(actual_price, expected_price, rtol=rtol, atol=atol)),
+    }
+
+
+def compiled_path(name):
+    from utils.config import MODELS_DIR, MODEL_FILES
+
+    return MODELS_DIR / MODEL_FILES[name].replace(".pkl", "_compiled.joblib")
+
+
+def main():
+    import joblib
+
+    from utils.config import DF_PATH, MODEL_FILES
+    from utils.models import load_pipeline, source_fingerprint
+    # Under ``python -m`` this module is ``__main__``; compile through the package
+    # so the saved classes unpickle as ``utils.tree_engine.*`` in the app
+    from utils.tree_engine import check_parity, compile_pipeline, compiled_path
+
+    parser = argparse.ArgumentParser(description="Compile tree-ensemble pipelines into flat arrays.")
+    parser.add_argument("models", nargs="*", default=list(MODEL_FILES), help="Short model names")
+    parser.add_argument("--no-save", action="store_true", help="Only run the parity check")
+    args = parser.parse_args()
+
+    reference = pd.read_pickle(DF_PATH)
+    single = reference.iloc[[0]]
+    for name in args.models:
+        pipeline = load_pipeline(name)
+        compiled = compile_pipeline(pipeline, reference)
+        parity = check_parity(pipeline, compiled, reference)
+
+        timings = {}
+        for label, model in (("pipeline", pipeline), ("compiled", compiled)):
+            start = time.perf_counter()
+            for _ in range(20):
+                model.predict(single)
+            timings[label] = (time.perf_counter() - start) / 20 * 1000
+
+        status = "OK" if parity["ok"] else "MISMATCH"
+        print(f"{name}: {compiled.trees.n_trees} trees, {compiled.trees.n_nodes} nodes | "
+              f"parity {status} (log {parity['max_log_diff']:.2e}, price {parity['max_price_diff']:.2e}) | "
+              f"single row {timings['pipeline']:.2f} ms -> {timings['compiled']:.2f} ms")
+
+        if not parity["ok"]:
+            raise SystemExit(f"{name}: compiled predictions do not match the pipeline")
+        if not args.no_save:
+            compiled.source = source_fingerprint(name)
+            joblib.dump(compiled, compiled_path(name))
+            print(f"  saved {compiled_path(name)}")
+
+
+if __name__ == "__main__":
+    main()